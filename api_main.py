@@ -1,31 +1,61 @@
 import os
 import sys
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Union
+import asyncio
+import math
 from datetime import datetime, timezone, timedelta
 import psycopg2
+import psycopg2.extras
 from psycopg2 import pool as psycopg2_pool
-from jose import JWTError, jwt
 import uvicorn
 from dotenv import load_dotenv
 import time
 
 load_dotenv()
 
+from src.metrics import registry, request_trace, span, REQUEST_LATENCY
+
 try:
     from src.config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, DB_ENDPOINT_ID, GOOGLE_API_KEY
-    from src.database import conn_pool
-    from src.graph_builder import graph_app
+    from src.config import WARMUP_ON_STARTUP, EMBEDDING_TIMEOUT, CACHE_INVALIDATION_LISTENER, DB_POOL_TIMEOUT
+    from src.database import get_conn_pool, get_pooled_connection, PoolTimeout
     from src.embedding import embedding_model
+    from src.embedding_pool import embedding_pool
+    from src.startup import warm_up, readiness
+    from src.cache_listener import start_listener, stop_listener
+    from src.history_archive import export_history, ExportsBusy
+    from src.auth import AuthError, token_verifier, user_id_from_claims
+    from src.admission import admission_controller, Overloaded
     from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 except ImportError as e:
     print(f"Error importing from src: {e}. Using placeholders. API will likely fail at runtime until this is fixed.")
     DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, DB_ENDPOINT_ID, GOOGLE_API_KEY = [None]*7
-    conn_pool = None
-    graph_app = None
+    WARMUP_ON_STARTUP = False
+    CACHE_INVALIDATION_LISTENER = False
+    get_conn_pool = lambda: None
+    EMBEDDING_TIMEOUT = None
     embedding_model = None
+    embedding_pool = None
+    warm_up = None
+    readiness = lambda: (False, {})
+    export_history = None
+    token_verifier = None
+    admission_controller = None
+    get_pooled_connection = None
+    class AuthError(Exception):
+        pass
+    class Overloaded(Exception):
+        pass
+    class ExportsBusy(Exception):
+        pass
+    class PoolTimeout(Exception):
+        pass
+    DB_POOL_TIMEOUT = 5
     class HumanMessage:
         def __init__(self, content):
             self.content = content
@@ -34,14 +64,24 @@ except ImportError as e:
             self.content = content
     BaseMessage = Dict
 
-JWT_SECRET_KEY = os.getenv("JWT_SECRET")
-ALGORITHM = "HS256"
-
 app = FastAPI(
     title="Travel Chatbot API",
     version="1.0.0"
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, status=status_code)
+
 reusable_oauth2 = HTTPBearer(
     scheme_name="Bearer"
 )
@@ -63,24 +103,12 @@ async def get_current_user(token: HTTPAuthorizationCredentials = Depends(reusabl
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token.credentials, JWT_SECRET_KEY, algorithms=[ALGORITHM])
-
-        user_id: Optional[int] = payload.get("id")
-        if user_id is None:
-            user_id = payload.get("userId")
-
-        if user_id is None:
-            print(f"JWT payload does not contain 'id' or 'userId' field. Payload: {payload}")
-            raise credentials_exception
-
-    except JWTError as e:
-        print(f"JWTError: {e}")
+    if token_verifier is None:
         raise credentials_exception
-    except Exception as e:
-        print(f"An unexpected error occurred during JWT decoding: {e}")
+    try:
+        return user_id_from_claims(token_verifier.verify(token.credentials))
+    except AuthError:
         raise credentials_exception
-    return user_id
 
 class ChatMessageInput(BaseModel):
     message: str = Field(..., description="The text message sent by the user to the chatbot.")
@@ -92,16 +120,20 @@ class ChatResponseOutput(BaseModel):
     session_id: Optional[str] = Field(None, description="The session identifier, mirrored if provided in input.")
     timestamp: datetime = Field(..., description="UTC timestamp of when the response was generated.")
 
-def get_db_connection():
-    if conn_pool is None:
-        print("conn_pool is None in get_db_connection. Database module likely not initialized.")
-        raise HTTPException(status_code=503, detail="Database connection pool not initialized. Check src.database and .env configuration.")
+def load_graph_app():
+    # src.graph_builder pulls in langgraph and compiles the graph, so it is
+    # imported on first chat request (or by the warm-up task), not at startup.
     try:
-        conn = conn_pool.getconn()
-        yield conn
-    finally:
-        if conn:
-            conn_pool.putconn(conn)
+        from src.graph_builder import get_graph_app
+        return get_graph_app()
+    except Exception as e:
+        print(f"Error building chatbot graph: {e}")
+        return None
+
+def require_db_pool():
+    if get_conn_pool() is None:
+        print("conn_pool is None in require_db_pool. Database module likely not initialized.")
+        raise HTTPException(status_code=503, detail="Database connection pool not initialized. Check src.database and .env configuration.")
 
 def fetch_conversation_history(db_conn, user_id: int) -> List[BaseMessage]:
     history: List[BaseMessage] = []
@@ -133,16 +165,54 @@ def save_interaction_to_history(db_conn, user_id: int, user_message: str, chatbo
         print(f"Error saving interaction to history for user_id {user_id}: {e}")
         db_conn.rollback()
 
-@app.post("/api/chat/", response_model=ChatResponseOutput)
-async def chat_endpoint(payload: ChatMessageInput, current_user_id: int = Depends(get_current_user), db_conn = Depends(get_db_connection)):
+def _busy(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The chatbot is busy, please retry shortly.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+def require_chat_ready():
+    # Building the graph and opening the pool both block on first use, so
+    # this runs in the threadpool rather than on the event loop.
+    graph_app = load_graph_app()
     if graph_app is None:
         print("graph_app is None in chat_endpoint. Graph_builder module likely not initialized.")
         raise HTTPException(status_code=503, detail="Chatbot graph not initialized. Check src.graph_builder.")
+    require_db_pool()
+    return graph_app
+
+@app.post("/api/chat/", response_model=ChatResponseOutput)
+async def chat_endpoint(payload: ChatMessageInput, response: Response, current_user_id: int = Depends(get_current_user), x_debug_timing: Optional[str] = Header(None)):
+    graph_app = await run_in_threadpool(require_chat_ready)
 
-    user_id = current_user_id
+    with request_trace() as trace:
+        try:
+            if admission_controller is None:
+                result = await run_in_threadpool(_run_chat, graph_app, payload, current_user_id)
+            else:
+                async with admission_controller.admit() as outcome:
+                    try:
+                        result = await run_in_threadpool(_run_chat, graph_app, payload, current_user_id)
+                    finally:
+                        outcome["llm_latency"] = max((d for name, d in trace.spans if name == "llm"), default=None)
+        except Overloaded as e:
+            raise _busy(e.retry_after)
+        except PoolTimeout as e:
+            print(f"Chat request for user_id {current_user_id} shed: {e}")
+            raise _busy(max(1, math.ceil(DB_POOL_TIMEOUT)))
+    if x_debug_timing:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return result
+
+def _run_chat(graph_app, payload: ChatMessageInput, user_id: int) -> ChatResponseOutput:
+    # Runs in the threadpool. Connections are checked out only around the
+    # history queries; graph nodes take their own for each query, so none is
+    # held while the LLM is working.
     user_message_content = payload.message
 
-    history = fetch_conversation_history(db_conn, user_id)
+    with span("fetch_history"), get_pooled_connection() as db_conn:
+        history = fetch_conversation_history(db_conn, user_id)
     
     current_message = HumanMessage(content=user_message_content)
     all_messages = history + [current_message]
@@ -173,11 +243,14 @@ async def chat_endpoint(payload: ChatMessageInput, current_user_id: int = Depend
         if not full_response_content:
             full_response_content = "Sorry, I could not process your request at this moment."
 
+    except PoolTimeout:
+        raise
     except Exception as e:
         print(f"Error during graph invocation for user_id {user_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing message with chatbot: {str(e)}")
 
-    save_interaction_to_history(db_conn, user_id, user_message_content, full_response_content)
+    with span("save_history"), get_pooled_connection() as db_conn:
+        save_interaction_to_history(db_conn, user_id, user_message_content, full_response_content)
 
     return ChatResponseOutput(
         user_id=user_id,
@@ -186,10 +259,40 @@ async def chat_endpoint(payload: ChatMessageInput, current_user_id: int = Depend
         timestamp=datetime.now(timezone.utc)
     )
 
+@app.get("/api/history/export")
+async def export_history_endpoint(current_user_id: int = Depends(get_current_user)):
+    if export_history is None or await run_in_threadpool(get_conn_pool) is None:
+        raise HTTPException(status_code=503, detail="Database connection pool not initialized.")
+    try:
+        export = export_history(current_user_id, blocking=False)
+    except ExportsBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many history exports are running, please retry shortly.",
+            headers={"Retry-After": "10"},
+        )
+    return StreamingResponse(
+        export,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="history_{current_user_id}.ndjson"'},
+    )
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok", "message": "API is running"}
 
+@app.get("/api/ready")
+async def readiness_check():
+    ready, components = readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "starting", "components": components}
+    )
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/embed", response_model=EmbeddingResponse)
 async def get_embedding(request: EmbeddingRequest):
     if embedding_model is None:
@@ -199,13 +302,23 @@ async def get_embedding(request: EmbeddingRequest):
         )
 
     try:
-        embeddings = embedding_model.get_embedding(request.text)
+        # Encoding is CPU-bound: it runs in the worker processes when
+        # configured, otherwise on the threadpool to keep the event loop free.
+        if embedding_pool is not None:
+            embeddings = await embedding_pool.aget_embedding(request.text, EMBEDDING_TIMEOUT)
+        else:
+            embeddings = await run_in_threadpool(embedding_model.get_embedding, request.text)
 
         return {
             "embeddings": embeddings,
             "model": embedding_model.model_name,
             "dimensions": len(embeddings[0])
         }
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Embedding workers did not respond in time."
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -214,8 +327,16 @@ async def get_embedding(request: EmbeddingRequest):
 
 @app.on_event("startup")
 async def startup_event():
-    try:
-        if embedding_model:
-            embedding_model.load_model()
-    except Exception as e:
-        print(f"Failed to load embedding model on startup: {str(e)}")
\ No newline at end of file
+    # Warm-up runs in the background so the server accepts traffic (and
+    # answers /api/health) immediately; /api/ready flips once it finishes.
+    if WARMUP_ON_STARTUP and warm_up is not None:
+        app.state.warmup = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    if CACHE_INVALIDATION_LISTENER:
+        start_listener()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if CACHE_INVALIDATION_LISTENER:
+        stop_listener()
+    if embedding_pool is not None:
+        embedding_pool.close()
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""Benchmarks for the chat pipeline hot paths.
+
+Importing this package defaults the process to the fake LLM backend and to
+an unreachable database, so nothing here touches Gemini or a database from
+``.env`` by accident. Entity, tour and search caches are disabled so repeated
+iterations measure the work rather than cache hits. Database benchmarks run only when DB_* variables
+pointing at a local fixture database are exported explicitly (see
+``benchmarks.fixtures``).
+
+    python -m benchmarks.run --output bench.json
+"""
+import os
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("DB_NAME", "benchmark")
+os.environ.setdefault("DB_USER", "benchmark")
+os.environ.setdefault("DB_HOST", "127.0.0.1")
+os.environ.setdefault("DB_PORT", "1")
+os.environ.setdefault("ENTITY_CACHE_TTL", "0")
+os.environ.setdefault("TOUR_CACHE_TTL", "0")
+os.environ.setdefault("SEARCH_CACHE_TTL", "0")
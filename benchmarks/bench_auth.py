@@ -0,0 +1,43 @@
+"""Per-request bearer token verification cost.
+
+    python -m benchmarks.bench_auth
+
+Compares python-jose and the standard library HS256 verifier on a cold
+cache (every request a new token) and a warm one (a client reusing its token).
+"""
+import json
+import sys
+import time
+
+from jose import jwt
+
+from benchmarks.harness import measure
+from src.auth import TokenVerifier, user_id_from_claims
+
+SECRET = "bench-secret"
+TOKENS = 1000
+
+def _tokens(count):
+    exp = int(time.time()) + 3600
+    return [jwt.encode({"id": i, "exp": exp, "iat": exp - 3600}, SECRET, algorithm="HS256") for i in range(count)]
+
+def _verify_all(verifier, tokens):
+    for token in tokens:
+        user_id_from_claims(verifier.verify(token))
+
+def run():
+    tokens = _tokens(TOKENS)
+    results = []
+    for backend in ("jose", "hmac"):
+        for cache in ("cold", "warm"):
+            verifier = TokenVerifier(SECRET, backend=backend, max_entries=TOKENS if cache == "warm" else 0)
+            stats = measure(lambda: _verify_all(verifier, tokens), repeat=10)
+            results.append({
+                "backend": backend, "cache": cache, "tokens": TOKENS, **stats,
+                "us_per_request": round(stats["p50_ms"] * 1000 / TOKENS, 2),
+            })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "auth", "results": run()}, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,34 @@
+"""EmbeddingModel.get_embedding at several batch sizes.
+
+    python -m benchmarks.bench_embedding
+"""
+import json
+import sys
+
+from benchmarks.harness import SkipBenchmark, measure
+
+BATCH_SIZES = [1, 8, 32, 128]
+SENTENCE = "Tour du lịch Đà Nẵng - Hội An 3 ngày 2 đêm khởi hành từ Hà Nội"
+
+def run():
+    from src.embedding import EmbeddingModel
+
+    model = EmbeddingModel()
+    try:
+        model.load_model()
+    except RuntimeError as e:
+        raise SkipBenchmark(f"embedding model unavailable: {e}")
+    results = []
+    for batch_size in BATCH_SIZES:
+        texts = [f"{SENTENCE} #{i}" for i in range(batch_size)]
+        stats = measure(lambda: model.get_embedding(texts), repeat=10)
+        results.append({
+            "batch_size": batch_size,
+            "texts_per_second": round(batch_size / (stats["p50_ms"] / 1000), 1),
+            **stats,
+        })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "embedding", "results": run()}, sys.stdout, indent=2)
+    print()
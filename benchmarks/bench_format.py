@@ -0,0 +1,33 @@
+"""format_itineraries on realistic HTML itineraries.
+
+    python -m benchmarks.bench_format
+"""
+import copy
+import json
+import random
+import sys
+
+from benchmarks.fixtures import DESTINATIONS, _itinerary
+from benchmarks.harness import measure
+from src.tools import format_itineraries
+
+TOUR_COUNTS = [1, 10, 100]
+DAYS = [3, 7]
+
+def _tours(count, days, rng):
+    destinations = DESTINATIONS[2]
+    return [{"tour_id": i, "itinerary": _itinerary(rng, destinations, days)} for i in range(count)]
+
+def run():
+    rng = random.Random(0)
+    results = []
+    for days in DAYS:
+        for count in TOUR_COUNTS:
+            tours = _tours(count, days, rng)
+            stats = measure(format_itineraries, repeat=20, setup=lambda: copy.deepcopy(tours))
+            results.append({"tours": count, "days": days, **stats})
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "format_itineraries", "results": run()}, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,54 @@
+"""Full graph_app.invoke turns on the fake LLM backend.
+
+Uses the fixture database for locations and tour search when one is
+reachable, otherwise measures the graph with empty search results.
+
+    python -m benchmarks.bench_graph
+"""
+import json
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from benchmarks.harness import measure
+from src.database import get_conn_pool
+from src.graph_builder import get_graph_app
+
+QUERIES = {
+    "search": "Tìm tour Đà Nẵng 3 ngày dưới 10 triệu",
+    "respond": "Xin chào, bạn là ai?",
+    "itinerary": "Cho tôi xem lịch trình tour đầu tiên",
+}
+HISTORY_LENGTHS = [0, 20, 200]
+
+def _inputs(history_length, query):
+    messages = []
+    for i in range(history_length // 2):
+        messages.append(HumanMessage(content=f"Tìm tour số {i}"))
+        messages.append(AIMessage(content=f"Đây là tour Đà Nẵng (ID: {i + 1})"))
+    messages.append(HumanMessage(content=query))
+    return {
+        "messages": messages,
+        "user_query": None, "current_date": None, "available_locations": None,
+        "extracted_entities": None, "search_results": None,
+        "final_response": None, "error": None,
+        "routing_decision": None,
+    }
+
+def run():
+    graph_app = get_graph_app()
+    results = []
+    for name, query in QUERIES.items():
+        for history_length in HISTORY_LENGTHS:
+            stats = measure(lambda: graph_app.invoke(_inputs(history_length, query)), repeat=10)
+            results.append({
+                "query": name,
+                "history_length": history_length,
+                "database": get_conn_pool() is not None,
+                **stats,
+            })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "graph", "results": run()}, sys.stdout, indent=2)
+    print()
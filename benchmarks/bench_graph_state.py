@@ -0,0 +1,111 @@
+"""Per-turn allocation of the chat graph versus conversation history length.
+
+Runs one turn through ``graph_app`` on the fake LLM backend (no Gemini quota,
+no database) and reports peak traced memory and wall time per history length.
+The ``legacy_*`` columns run the same nodes in a graph that merges state the
+old way (``{**state, ...}`` and ``list(messages) + [...]`` in every node), so
+the cost of full-state copies can be read off directly.
+
+    python -m benchmarks.bench_graph_state
+"""
+import json
+import sys
+import time
+import tracemalloc
+from typing import List, Optional, Sequence, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import StateGraph
+
+import src.graph_builder as graph_builder
+
+HISTORY_LENGTHS = [10, 100, 1000, 5000]
+REPEAT = 11
+
+def _history(length):
+    messages = []
+    for i in range(length // 2):
+        messages.append(HumanMessage(content=f"Câu hỏi số {i} về tour Đà Nẵng"))
+        messages.append(AIMessage(content=f"Câu trả lời số {i}"))
+    return messages
+
+def _inputs(messages):
+    return {
+        "messages": messages,
+        "user_query": None, "current_date": None, "available_locations": None,
+        "extracted_entities": None, "search_results": None,
+        "final_response": None, "error": None,
+        "routing_decision": None,
+    }
+
+class _LegacyState(TypedDict):
+    messages: Sequence[BaseMessage]
+    user_query: str
+    current_date: str
+    available_locations: Optional[List[str]]
+    extracted_entities: Optional[dict]
+    search_results: Optional[List[dict]]
+    final_response: Optional[str]
+    error: Optional[str]
+    routing_decision: Optional[str]
+
+def _legacy(node):
+    def wrapper(state):
+        update = node(state)
+        if "messages" in update:
+            update["messages"] = list(state["messages"]) + list(update["messages"])
+        return {**state, **update}
+    return wrapper
+
+def _build_legacy_graph():
+    graph = graph_builder.build_graph()
+    workflow = StateGraph(_LegacyState)
+    for name, spec in graph.builder.nodes.items():
+        workflow.add_node(name, _legacy(spec.runnable.func))
+    for start, end in graph.builder.edges:
+        workflow.add_edge(start, end)
+    for start, branches in graph.builder.branches.items():
+        for branch in branches.values():
+            path = branch.path.func
+            workflow.add_conditional_edges(start, lambda state, path=path: path(state), branch.ends)
+    return workflow.compile()
+
+def _measure(graph_app, messages):
+    tracemalloc.start()
+    graph_app.invoke(_inputs(list(messages)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        graph_app.invoke(_inputs(list(messages)))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return peak, timings[len(timings) // 2] * 1000
+
+def run():
+    graph_app = graph_builder.get_graph_app()
+    legacy_app = _build_legacy_graph()
+
+    warmup = _history(2) + [HumanMessage(content="tour Đà Nẵng")]
+    graph_app.invoke(_inputs(warmup))
+    legacy_app.invoke(_inputs(warmup))
+
+    results = []
+    for length in HISTORY_LENGTHS:
+        messages = _history(length) + [HumanMessage(content="Tìm tour Đà Nẵng tháng 12")]
+        peak, median_ms = _measure(graph_app, messages)
+        legacy_peak, legacy_median_ms = _measure(legacy_app, messages)
+        results.append({
+            "history_length": length,
+            "peak_bytes": peak,
+            "median_ms": round(median_ms, 3),
+            "legacy_peak_bytes": legacy_peak,
+            "legacy_median_ms": round(legacy_median_ms, 3),
+        })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "graph_state", "results": run()}, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,35 @@
+"""fetch_conversation_history for users with 10, 1k and 10k stored turns.
+
+    python -m benchmarks.bench_history
+"""
+import json
+import sys
+
+from benchmarks import fixtures
+from benchmarks.harness import measure, require_database
+from src.database import get_pooled_connection
+
+HISTORY_ROWS = [10, 1000, 10000]
+
+def run():
+    require_database()
+    from api_main import fetch_conversation_history
+
+    results = []
+    with get_pooled_connection() as conn:
+        fixtures.create_schema(conn)
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM ChatbotHistory WHERE user_id = ANY(%s)", (list(range(1, len(HISTORY_ROWS) + 1)),))
+        conn.commit()
+        for user_id, rows in enumerate(HISTORY_ROWS, start=1):
+            fixtures.seed_history(conn, user_id, rows)
+
+        for user_id, rows in enumerate(HISTORY_ROWS, start=1):
+            messages = len(fetch_conversation_history(conn, user_id))
+            stats = measure(lambda: fetch_conversation_history(conn, user_id), repeat=10)
+            results.append({"rows": rows, "messages": messages, **stats})
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "fetch_conversation_history", "results": run()}, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,85 @@
+"""search_tours_db through the old and the prepared-statement query paths.
+
+For each filter shape the same SQL runs three ways:
+
+- ``dict_rows``: plain execute, DictCursor and a dict copy per row (the
+  previous execute_query)
+- ``records``: plain execute, rows as Record instances
+- ``prepared_records``: EXECUTE of a per-connection prepared statement
+
+Server planning time comes from EXPLAIN ANALYZE of the plain query versus
+the prepared statement after it has settled on a generic plan; Python
+allocations are the tracemalloc peak while fetching the rows. Reseeds the
+fixture tables, so it only runs against a local database.
+
+    python -m benchmarks.bench_prepared
+"""
+import json
+import sys
+import tracemalloc
+
+from psycopg2.extras import DictCursor
+
+from benchmarks import fixtures
+from benchmarks.bench_search import filter_combinations
+from benchmarks.harness import measure, require_database
+from src.database import build_search_query, execute_query, get_pooled_connection, _prepare_statement
+
+CATALOG_SIZE = 1000
+
+def _dict_rows(query, params):
+    with get_pooled_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            cur.execute(query, params)
+            return [dict(row) for row in cur.fetchall()]
+
+def _peak_kib(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def _planning_ms(query, params):
+    with get_pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query, params)
+            plain = cur.fetchone()[0][0]["Planning Time"]
+            # Postgres switches to a cached generic plan after five executions.
+            for _ in range(6):
+                cur.execute(_prepare_statement(cur, "search_tours", query, params), params)
+            cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + _prepare_statement(cur, "search_tours", query, params), params)
+            prepared = cur.fetchone()[0][0]["Planning Time"]
+    return round(plain, 3), round(prepared, 3)
+
+def run():
+    require_database()
+    with get_pooled_connection() as conn:
+        fixtures.create_schema(conn, reset=True)
+        fixtures.seed_tours(conn, tours=CATALOG_SIZE)
+
+    paths = {
+        "dict_rows": _dict_rows,
+        "records": lambda q, p: execute_query(q, p, name="search_tours", prepared=False),
+        "prepared_records": lambda q, p: execute_query(q, p, name="search_tours", prepared=True),
+    }
+    results = []
+    for name, entities in filter_combinations().items():
+        query, params = build_search_query(entities)
+        plain_planning, prepared_planning = _planning_ms(query, params)
+        for path, fn in paths.items():
+            rows = len(fn(query, params))
+            stats = measure(lambda: fn(query, params), repeat=20)
+            results.append({
+                "filters": name,
+                "path": path,
+                "rows": rows,
+                "planning_ms": prepared_planning if path == "prepared_records" else plain_planning,
+                "peak_kib": _peak_kib(lambda: fn(query, params)),
+                **stats,
+            })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "prepared", "results": run()}, sys.stdout, indent=2)
+    print()
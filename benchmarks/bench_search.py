@@ -0,0 +1,59 @@
+"""search_tours_db across filter combinations and catalog sizes.
+
+Reseeds the fixture tables for every catalog size, so it only runs against
+a local database (see benchmarks.fixtures).
+
+    python -m benchmarks.bench_search
+"""
+import json
+import sys
+from datetime import date, timedelta
+
+from benchmarks import fixtures
+from benchmarks.harness import measure, require_database
+from src.database import get_pooled_connection, search_tours_db
+
+CATALOG_SIZES = [100, 1000, 5000]
+
+def filter_combinations():
+    today = date.today()
+    return {
+        "none": {},
+        "region": {"region": 2},
+        "destination": {"destination": "Đà Nẵng"},
+        "destinations": {"destination": ["Hà Nội", "Sapa", "Hạ Long"]},
+        "duration": {"duration": "3 ngày 2 đêm"},
+        "date_range": {"time": {"start_date": str(today), "end_date": str(today + timedelta(days=60))}},
+        "budget": {"budget": "3000000-8000000"},
+        "people": {"number_of_people": "4"},
+        "destination_budget_date": {
+            "destination": "Phú Quốc",
+            "budget": "15000000",
+            "time": [{"start_date": str(today), "end_date": str(today + timedelta(days=90))}],
+        },
+        "all": {
+            "region": 3,
+            "destination": ["Phú Quốc", "Côn Đảo"],
+            "duration": "4 ngày",
+            "time": {"start_date": str(today), "end_date": str(today + timedelta(days=120))},
+            "budget": "20000000",
+            "number_of_people": ">2",
+        },
+    }
+
+def run():
+    require_database()
+    results = []
+    for size in CATALOG_SIZES:
+        with get_pooled_connection() as conn:
+            fixtures.create_schema(conn, reset=True)
+            fixtures.seed_tours(conn, tours=size)
+        for name, entities in filter_combinations().items():
+            rows = len(search_tours_db(entities))
+            stats = measure(lambda: search_tours_db(entities), repeat=10)
+            results.append({"catalog_size": size, "filters": name, "rows": rows, **stats})
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "search_tours_db", "results": run()}, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,78 @@
+"""Search-turn latency of the sequential graph versus the speculative graph.
+
+The fake LLM backend and a stub tour search sleep for fixed durations, so the
+numbers show graph scheduling only: sequential search turns cost route + NER
++ search, speculative ones max(route, NER + search). Respond turns should cost
+the same in both modes since the prefetch is not awaited.
+
+    python -m benchmarks.bench_speculative
+"""
+import json
+import sys
+import time
+
+from langchain_core.messages import HumanMessage
+
+import src.graph_builder as graph_builder
+import src.llm
+from src.fake_llm import FakeChatModel
+
+ROUTE_SECONDS = 0.30
+NER_SECONDS = 0.35
+SEARCH_SECONDS = 0.05
+RESPONSE_SECONDS = 0.10
+REPEAT = 5
+
+def _search_tours_tool(entities):
+    time.sleep(SEARCH_SECONDS)
+    return []
+
+def _inputs(query):
+    return {
+        "messages": [HumanMessage(content=query)],
+        "user_query": None, "current_date": None, "available_locations": None,
+        "extracted_entities": None, "search_results": None,
+        "final_response": None, "error": None,
+        "routing_decision": None,
+    }
+
+def _median_ms(graph_app, query):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        graph_app.invoke(_inputs(query))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return round(timings[len(timings) // 2] * 1000, 1)
+
+def run():
+    model = FakeChatModel(
+        route_latency=f"fixed:{ROUTE_SECONDS}",
+        ner_latency=f"fixed:{NER_SECONDS}",
+        response_latency=f"fixed:{RESPONSE_SECONDS}",
+        entities={"destination": "Phú Quốc"},
+    )
+    client = src.llm.get_llm_client(model)
+    graph_builder.llm = client
+    src.llm.llm = client
+    graph_builder.search_tours_tool = _search_tours_tool
+
+    graphs = {
+        "sequential": graph_builder.build_graph(speculative=False),
+        "speculative": graph_builder.build_graph(speculative=True),
+    }
+
+    results = []
+    for route in ("search", "respond"):
+        model.route = route
+        for mode, graph_app in graphs.items():
+            results.append({
+                "mode": mode,
+                "route": route,
+                "median_ms": _median_ms(graph_app, "Tour Phú Quốc tháng 12"),
+            })
+    return results
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "speculative", "results": run()}, sys.stdout, indent=2)
+    print()
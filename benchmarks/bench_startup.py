@@ -0,0 +1,49 @@
+"""Cold-start cost of the API process.
+
+Each repetition starts a fresh interpreter, times ``import api_main`` (what
+the server pays before it can answer /api/health) and then the background
+warm-up of every component. ``eager_s`` is their sum: what importing cost
+when the pool, LLM client, graph and SBERT model were all built at import.
+
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPEAT = 3
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import api_main
+import_s = time.perf_counter() - start
+from src.startup import warm_up
+start = time.perf_counter()
+components = warm_up()
+warm_up_s = time.perf_counter() - start
+print(json.dumps({"import_s": import_s, "warm_up_s": warm_up_s, "components": components}))
+"""
+
+def _run_child():
+    output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=ROOT, env=os.environ.copy(), text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def run():
+    samples = [_run_child() for _ in range(REPEAT)]
+    import_s = statistics.median(s["import_s"] for s in samples)
+    warm_up_s = statistics.median(s["warm_up_s"] for s in samples)
+    return [{
+        "repeat": REPEAT,
+        "import_s": round(import_s, 3),
+        "warm_up_s": round(warm_up_s, 3),
+        "eager_s": round(import_s + warm_up_s, 3),
+        "components": samples[-1]["components"],
+    }]
+
+if __name__ == "__main__":
+    json.dump({"benchmark": "startup", "results": run()}, sys.stdout, indent=2)
+    print()
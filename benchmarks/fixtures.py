@@ -0,0 +1,209 @@
+"""Local Postgres fixture for load tests and benchmarks.
+
+Creates the tables the chatbot queries (Tour, Departure, Promotion,
+Tour_Promotion, ChatbotHistory) and fills them with deterministic synthetic
+data. Point DB_* at a throwaway local database first:
+
+    python -m benchmarks.fixtures --tours 500 --history-users 20 --history-rows 1000
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from src.config import DB_HOST
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", ""}
+
+DESTINATIONS = {
+    1: ["Hà Nội", "Hạ Long", "Sapa", "Ninh Bình", "Hà Giang", "Cao Bằng", "Lào Cai"],
+    2: ["Đà Nẵng", "Hội An", "Huế", "Quảng Bình", "Nha Trang", "Quy Nhơn"],
+    3: ["Phú Quốc", "Thành phố Hồ Chí Minh", "Cần Thơ", "Côn Đảo", "Vũng Tàu", "Đà Lạt"],
+}
+DEPARTURE_LOCATIONS = ["Hà Nội", "Đà Nẵng", "Thành phố Hồ Chí Minh"]
+DURATIONS = ["2 ngày 1 đêm", "3 ngày 2 đêm", "4 ngày 3 đêm", "5 ngày 4 đêm"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS Tour (
+    tour_id SERIAL PRIMARY KEY,
+    title TEXT NOT NULL,
+    duration TEXT,
+    departure_location TEXT,
+    destination TEXT[],
+    region INTEGER,
+    itinerary JSONB,
+    max_participants INTEGER,
+    availability BOOLEAN DEFAULT true
+);
+CREATE TABLE IF NOT EXISTS Departure (
+    departure_id SERIAL PRIMARY KEY,
+    tour_id INTEGER REFERENCES Tour(tour_id) ON DELETE CASCADE,
+    start_date DATE,
+    price_adult NUMERIC,
+    price_child_120_140 NUMERIC,
+    price_child_100_120 NUMERIC,
+    availability BOOLEAN DEFAULT true
+);
+CREATE TABLE IF NOT EXISTS Promotion (
+    promotion_id SERIAL PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    discount NUMERIC,
+    start_date DATE,
+    end_date DATE,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS Tour_Promotion (
+    tour_id INTEGER REFERENCES Tour(tour_id) ON DELETE CASCADE,
+    promotion_id INTEGER REFERENCES Promotion(promotion_id) ON DELETE CASCADE,
+    PRIMARY KEY (tour_id, promotion_id)
+);
+CREATE TABLE IF NOT EXISTS ChatbotHistory (
+    history_id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    message TEXT,
+    response TEXT,
+    interaction_time TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+RESET_SQL = "DROP TABLE IF EXISTS Tour_Promotion, Promotion, Departure, Tour, ChatbotHistory CASCADE;"
+
+def _itinerary(rng, destinations, days):
+    itinerary = []
+    for day in range(1, days + 1):
+        place = rng.choice(destinations)
+        itinerary.append({
+            "day_number": day,
+            "title": f"{place} - Ngày {day}",
+            "description": (
+                f"<p><strong>Sáng:</strong> Tham quan {place}, dùng bữa sáng tại khách sạn.</p>"
+                f"<ul><li>Check-in các điểm nổi tiếng</li><li>Ăn trưa đặc sản {place}</li></ul>"
+                f"<p><em>Chiều:</em> Tự do khám phá, nghỉ đêm tại {place}.</p>"
+            ),
+        })
+    return itinerary
+
+def create_schema(conn, reset: bool = False):
+    with conn.cursor() as cur:
+        if reset:
+            cur.execute(RESET_SQL)
+        cur.execute(SCHEMA_SQL)
+    conn.commit()
+
+def seed_tours(conn, tours: int = 200, departures_per_tour: int = 4, promotions: int = 20, seed: int = 0):
+    rng = random.Random(seed)
+    today = date.today()
+    with conn.cursor() as cur:
+        tour_rows = []
+        for i in range(tours):
+            region = rng.choice(list(DESTINATIONS))
+            destinations = rng.sample(DESTINATIONS[region], k=rng.randint(1, 3))
+            duration = rng.choice(DURATIONS)
+            tour_rows.append((
+                f"Tour {' - '.join(destinations)} {duration} #{i + 1}",
+                duration,
+                rng.choice(DEPARTURE_LOCATIONS),
+                destinations,
+                region,
+                json.dumps(_itinerary(rng, destinations, int(duration[0])), ensure_ascii=False),
+                rng.choice([10, 15, 20, 30, 40]),
+            ))
+        tour_ids = [row[0] for row in execute_values(
+            cur,
+            "INSERT INTO Tour (title, duration, departure_location, destination, region, itinerary, max_participants) "
+            "VALUES %s RETURNING tour_id",
+            tour_rows, fetch=True, page_size=1000,
+        )]
+
+        departure_rows = []
+        for tour_id in tour_ids:
+            for _ in range(departures_per_tour):
+                price = rng.randrange(2000000, 20000000, 100000)
+                departure_rows.append((
+                    tour_id, today + timedelta(days=rng.randint(1, 240)),
+                    price, int(price * 0.75), int(price * 0.5),
+                ))
+        execute_values(
+            cur,
+            "INSERT INTO Departure (tour_id, start_date, price_adult, price_child_120_140, price_child_100_120) VALUES %s",
+            departure_rows, page_size=1000,
+        )
+
+        promotion_rows = []
+        for i in range(promotions):
+            start = today + timedelta(days=rng.randint(-30, 90))
+            if rng.random() < 0.5:
+                promotion_rows.append((f"Khuyến mãi {i + 1}", "percent", rng.choice([5, 10, 15, 20]), start, start + timedelta(days=60), "active"))
+            else:
+                promotion_rows.append((f"Ưu đãi {i + 1}", "fixed", rng.choice([200000, 500000, 1000000]), start, start + timedelta(days=60), "active"))
+        promotion_ids = [row[0] for row in execute_values(
+            cur,
+            "INSERT INTO Promotion (name, type, discount, start_date, end_date, status) VALUES %s RETURNING promotion_id",
+            promotion_rows, fetch=True,
+        )]
+
+        links = set()
+        for tour_id in tour_ids:
+            for promotion_id in rng.sample(promotion_ids, k=min(len(promotion_ids), rng.randint(0, 3))):
+                links.add((tour_id, promotion_id))
+        if links:
+            execute_values(cur, "INSERT INTO Tour_Promotion (tour_id, promotion_id) VALUES %s", sorted(links))
+    conn.commit()
+    return tour_ids
+
+def seed_history(conn, user_id: int, rows: int, seed: int = 0):
+    rng = random.Random(seed + user_id)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    history_rows = []
+    for i in range(rows):
+        destination = rng.choice(DESTINATIONS[rng.choice(list(DESTINATIONS))])
+        history_rows.append((
+            user_id,
+            f"Tìm tour {destination} {rng.choice(DURATIONS)}",
+            f"Đây là các tour {destination} phù hợp với yêu cầu của bạn (câu trả lời {i + 1}).",
+            start + timedelta(minutes=i * 7),
+        ))
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            "INSERT INTO ChatbotHistory (user_id, message, response, interaction_time) VALUES %s",
+            history_rows, page_size=1000,
+        )
+    conn.commit()
+
+def connect():
+    from src.database import DATABASE_URL
+    return psycopg2.connect(DATABASE_URL)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tours", type=int, default=200)
+    parser.add_argument("--departures-per-tour", type=int, default=4)
+    parser.add_argument("--promotions", type=int, default=20)
+    parser.add_argument("--history-users", type=int, default=0)
+    parser.add_argument("--history-rows", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the fixture tables first.")
+    parser.add_argument("--force", action="store_true", help="Allow a non-local DB_HOST.")
+    args = parser.parse_args(argv)
+
+    if DB_HOST not in LOCAL_HOSTS and not args.force:
+        sys.exit(f"Refusing to seed non-local database host '{DB_HOST}' without --force.")
+
+    conn = connect()
+    try:
+        create_schema(conn, reset=args.reset)
+        tour_ids = seed_tours(conn, args.tours, args.departures_per_tour, args.promotions, args.seed)
+        for user_id in range(1, args.history_users + 1):
+            seed_history(conn, user_id, args.history_rows, args.seed)
+    finally:
+        conn.close()
+    print(f"Seeded {len(tour_ids)} tours and {args.history_users} users' history into {DB_HOST}.")
+
+if __name__ == "__main__":
+    main()
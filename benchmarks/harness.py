@@ -0,0 +1,40 @@
+import statistics
+import time
+
+class SkipBenchmark(Exception):
+    pass
+
+def measure(fn, repeat: int = 20, warmup: int = 2, setup=None) -> dict:
+    """Time ``fn`` and return latency statistics in milliseconds.
+
+    ``setup`` runs before every call, outside the timed region, and its
+    return value is passed to ``fn``.
+    """
+    for _ in range(warmup):
+        fn(setup()) if setup else fn()
+
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+def require_database():
+    from src.config import DB_HOST
+    from src.database import get_conn_pool
+    from benchmarks.fixtures import LOCAL_HOSTS
+
+    if get_conn_pool() is None:
+        raise SkipBenchmark("database not reachable; export DB_* for a local fixture database")
+    if DB_HOST not in LOCAL_HOSTS:
+        raise SkipBenchmark(f"refusing to reseed non-local database host '{DB_HOST}'")
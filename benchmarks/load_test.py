@@ -0,0 +1,117 @@
+"""Replay JSONL chat traffic against /api/chat/ with a concurrency sweep.
+
+Each input line is a JSON object with a ``message`` (``text``/``title`` are
+accepted too) and an optional ``user_id``. Tokens are minted locally with
+JWT_SECRET, so run the API with the same secret, ideally offline:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=lognormal:0.4:0.3 uvicorn api_main:app --port 7860
+    python -m benchmarks.load_test requests.jsonl --concurrency 1,4,16,64
+
+Prints one JSON object per concurrency level with throughput and latency
+percentiles in milliseconds.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+def load_messages(path: str, default_user_ids: int):
+    items = []
+    user_ids = itertools.cycle(range(1, default_user_ids + 1))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            message = record.get("message") or record.get("text") or record.get("title")
+            if not message:
+                continue
+            items.append((int(record.get("user_id") or next(user_ids)), message))
+    return items
+
+def make_token(secret: str, user_id: int) -> str:
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    return jwt.encode({"id": user_id, "exp": expires}, secret, algorithm="HS256")
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))], 1)
+
+def send(url: str, token: str, message: str, timeout: float):
+    body = json.dumps({"message": message}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    })
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+def run_level(url, items, tokens, concurrency, total, timeout):
+    workload = list(itertools.islice(itertools.cycle(items), total))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            lambda item: send(url, tokens[item[0]], item[1], timeout), workload
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency * 1000 for status, latency in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(latencies),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of chat messages.")
+    parser.add_argument("--url", default="http://127.0.0.1:7860/api/chat/")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per level (default: one pass over the input).")
+    parser.add_argument("--users", type=int, default=50, help="Synthetic user ids for lines without user_id.")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--jwt-secret", default=os.getenv("JWT_SECRET"))
+    args = parser.parse_args(argv)
+
+    if not args.jwt_secret:
+        sys.exit("JWT secret required (--jwt-secret or JWT_SECRET).")
+
+    items = load_messages(args.input, args.users)
+    if not items:
+        sys.exit(f"No messages found in {args.input}.")
+    tokens = {user_id: make_token(args.jwt_secret, user_id) for user_id in {user_id for user_id, _ in items}}
+
+    for level in (int(c) for c in args.concurrency.split(",")):
+        result = run_level(args.url, items, tokens, level, args.requests or len(items), args.timeout)
+        print(json.dumps(result), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Run the benchmark suite and emit one JSON document.
+
+    python -m benchmarks.run                      # everything available
+    python -m benchmarks.run search graph -o bench.json
+
+Benchmarks whose dependencies are missing (database, sentence-transformers)
+are reported as skipped rather than failing the run.
+"""
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import time
+import traceback
+
+from benchmarks.harness import SkipBenchmark
+
+BENCHMARKS = {
+    "search": "benchmarks.bench_search",
+    "prepared": "benchmarks.bench_prepared",
+    "auth": "benchmarks.bench_auth",
+    "format": "benchmarks.bench_format",
+    "history": "benchmarks.bench_history",
+    "embedding": "benchmarks.bench_embedding",
+    "graph": "benchmarks.bench_graph",
+    "graph_state": "benchmarks.bench_graph_state",
+    "speculative": "benchmarks.bench_speculative",
+    "startup": "benchmarks.bench_startup",
+}
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def run_benchmark(name: str) -> dict:
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(BENCHMARKS[name])
+        report = {"status": "ok", "results": module.run()}
+    except SkipBenchmark as e:
+        report = {"status": "skipped", "reason": str(e)}
+    except Exception as e:
+        report = {"status": "error", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+    report["duration_s"] = round(time.perf_counter() - start, 3)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", help=f"Subset to run: {', '.join(BENCHMARKS)} (default: all).")
+    parser.add_argument("-o", "--output", help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    document = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        document["benchmarks"][name] = run_benchmark(name)
+
+    output = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if any(b["status"] == "error" for b in document["benchmarks"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from .config import (ADMISSION_CONTROL, ADMISSION_INITIAL_LIMIT, ADMISSION_MIN_LIMIT, ADMISSION_MAX_LIMIT,
+                     ADMISSION_LATENCY_TARGET, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT)
+from .metrics import ADMISSION_REQUESTS, ADMISSION_LIMIT, ADMISSION_IN_FLIGHT, ADMISSION_QUEUED
+
+MAX_RETRY_AFTER = 60
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"overloaded ({reason}), retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+class AdmissionController:
+    """Bounds in-flight requests with a limit that follows LLM latency (AIMD).
+
+    Each request that completes with its slowest LLM call under
+    `latency_target` raises the limit by 1/limit; a slower call or a failure
+    multiplies it by `backoff`, at most once per round trip (only requests
+    started after the previous decrease can trigger another). Requests over
+    the limit wait in a FIFO queue until their deadline; when the queue is
+    full, or the estimated wait already exceeds the deadline, they are
+    rejected immediately with a Retry-After estimate.
+
+    All methods run on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, initial_limit: int = ADMISSION_INITIAL_LIMIT, min_limit: int = ADMISSION_MIN_LIMIT,
+                 max_limit: int = ADMISSION_MAX_LIMIT, latency_target: float = ADMISSION_LATENCY_TARGET,
+                 max_queue: int = ADMISSION_MAX_QUEUE, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 backoff: float = 0.7):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self.latency_target = latency_target
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.in_flight = 0
+        self.request_latency = latency_target
+        self._last_decrease = 0.0
+        self._waiters = deque()
+        ADMISSION_LIMIT.set(int(self.limit))
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        if position is None:
+            position = len(self._waiters)
+        return (position + 1) * self.request_latency / int(self.limit)
+
+    def _overloaded(self, reason: str, wait: Optional[float] = None) -> Overloaded:
+        ADMISSION_REQUESTS.inc(result=reason)
+        wait = self.estimated_wait() if wait is None else wait
+        return Overloaded(max(1, min(MAX_RETRY_AFTER, math.ceil(wait))), reason)
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        ADMISSION_QUEUED.set(len(self._waiters))
+        ADMISSION_LIMIT.set(int(self.limit))
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Takes a slot, waiting at most `timeout` seconds; raises Overloaded."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_REQUESTS.inc(result="admitted")
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._overloaded("queue_full")
+        wait = self.estimated_wait()
+        if wait > timeout:
+            raise self._overloaded("deadline", wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended.
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                self._update_gauges()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                raise self._overloaded("timeout")
+        ADMISSION_REQUESTS.inc(result="queued")
+
+    def _wake_waiters(self):
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def release(self, started: Optional[float] = None, duration: Optional[float] = None,
+                llm_latency: Optional[float] = None, ok: bool = True):
+        """Frees a slot and feeds the outcome of the request into the limit."""
+        self.in_flight -= 1
+        if duration is not None:
+            self.request_latency = 0.8 * self.request_latency + 0.2 * duration
+        congested = not ok or (llm_latency is not None and llm_latency > self.latency_target)
+        if congested:
+            if started is not None and started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = time.monotonic()
+        elif llm_latency is not None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake_waiters()
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def admit(self, timeout: Optional[float] = None):
+        """Holds a slot for the block; yields a dict for the caller to fill
+        with `llm_latency` (seconds, or None if no LLM call was made)."""
+        await self.acquire(timeout)
+        started = time.monotonic()
+        outcome = {"llm_latency": None}
+        failed = False
+        try:
+            yield outcome
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(started, time.monotonic() - started, outcome["llm_latency"], not failed)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "request_latency": round(self.request_latency, 3),
+        }
+
+admission_controller = AdmissionController() if ADMISSION_CONTROL else None
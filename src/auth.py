@@ -0,0 +1,170 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from .config import JWT_SECRET, JWT_VERIFIER, JWT_CACHE_SIZE, JWT_CACHE_TTL
+from .metrics import AUTH_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "HS256"
+
+class AuthError(Exception):
+    """A rejected bearer token; `reason` is a short machine-readable code."""
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _numeric_claim(claims: dict, name: str) -> Optional[int]:
+    if name not in claims:
+        return None
+    try:
+        return int(claims[name])
+    except (TypeError, ValueError):
+        raise AuthError("invalid_claims", f"{name} must be an integer")
+
+def validate_claims(claims: dict, now: float, leeway: float = 0) -> Optional[int]:
+    """Applies the checks python-jose does by default; returns `exp` if present.
+
+    As with jose called without an audience, tokens carrying `aud` are refused.
+    """
+    _numeric_claim(claims, "iat")
+    nbf = _numeric_claim(claims, "nbf")
+    if nbf is not None and nbf > now + leeway:
+        raise AuthError("not_yet_valid")
+    exp = _numeric_claim(claims, "exp")
+    if exp is not None and exp < now - leeway:
+        raise AuthError("expired")
+    if "aud" in claims:
+        raise AuthError("invalid_claims", "unexpected audience")
+    return exp
+
+def hmac_decode(token: str, secret: str) -> dict:
+    """Verifies an HS256 token with the standard library only."""
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        signature = _b64decode(signature_b64)
+    except (ValueError, binascii.Error) as e:
+        raise AuthError("malformed", str(e))
+    if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+        raise AuthError("bad_algorithm", str(header.get("alg") if isinstance(header, dict) else header))
+    expected = hmac.new(secret.encode(), f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise AuthError("bad_signature")
+    try:
+        claims = json.loads(_b64decode(payload_b64))
+    except (ValueError, binascii.Error) as e:
+        raise AuthError("malformed", str(e))
+    if not isinstance(claims, dict):
+        raise AuthError("malformed", "payload is not an object")
+    return claims
+
+def jose_decode(token: str, secret: str) -> dict:
+    from jose import jwt, ExpiredSignatureError, JWTError
+    from jose.exceptions import JWTClaimsError
+    try:
+        return jwt.decode(token, secret, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise AuthError("expired")
+    except JWTClaimsError as e:
+        if "(nbf)" in str(e):
+            raise AuthError("not_yet_valid")
+        raise AuthError("invalid_claims", str(e))
+    except JWTError as e:
+        message = str(e)
+        if "Signature verification failed" in message:
+            raise AuthError("bad_signature")
+        if "alg" in message:
+            raise AuthError("bad_algorithm", message)
+        raise AuthError("malformed", message)
+
+BACKENDS = {"hmac": hmac_decode, "jose": jose_decode}
+
+class TokenVerifier:
+    """Verifies bearer tokens and remembers the claims of valid ones.
+
+    Entries are keyed by the SHA-256 of the token and kept until the token's
+    `exp` (or `ttl` seconds for tokens without one), in an LRU of at most
+    `max_entries`. Rejected tokens are never cached.
+    """
+
+    def __init__(self, secret: Optional[str] = JWT_SECRET, backend: str = JWT_VERIFIER,
+                 max_entries: int = JWT_CACHE_SIZE, ttl: float = JWT_CACHE_TTL):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JWT verifier '{backend}'; expected one of {', '.join(BACKENDS)}")
+        self.secret = secret
+        self.backend = backend
+        self._decode = BACKENDS[backend]
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key: bytes, now: float) -> Optional[dict]:
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None:
+                return None
+            claims, expires_at = item
+            if expires_at < now:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return claims
+
+    def _store(self, key: bytes, claims: dict, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (claims, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def verify(self, token: str) -> dict:
+        now = time.time()
+        key = hashlib.sha256(token.encode()).digest()
+        claims = self._cached(key, now)
+        if claims is not None:
+            AUTH_REQUESTS.inc(result="cached")
+            return claims
+        try:
+            if not self.secret:
+                raise AuthError("not_configured", "JWT_SECRET is not set")
+            claims = self._decode(token, self.secret)
+            exp = validate_claims(claims, now)
+        except AuthError as e:
+            AUTH_REQUESTS.inc(result=e.reason)
+            logger.info("Rejected bearer token (%s)%s", e.reason, f": {e.detail}" if e.detail else "")
+            raise
+        self._store(key, claims, exp if exp is not None else now + self.ttl)
+        AUTH_REQUESTS.inc(result="verified")
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+def user_id_from_claims(claims: dict):
+    user_id = claims.get("id")
+    if user_id is None:
+        user_id = claims.get("userId")
+    if user_id is None:
+        AUTH_REQUESTS.inc(result="missing_user_id")
+        logger.info("Rejected bearer token (missing_user_id): claims %s", sorted(claims))
+        raise AuthError("missing_user_id")
+    return user_id
+
+token_verifier = TokenVerifier()
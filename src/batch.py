@@ -0,0 +1,154 @@
+"""Run many chat messages through the graph offline and stream NDJSON results.
+
+Each input line is a JSON object with a ``message`` (``text``/``title`` are
+accepted too), an optional ``user_id`` and an optional ``id`` echoed back.
+Results are written one line per message as they finish, tagged with the
+input line ``index``:
+
+    python -m src.batch requests.jsonl --concurrency 8 > answers.ndjson
+    cat questions.ndjson | python -m src.batch - --save
+
+Messages are independent: each one sees its user's stored history as of the
+start of its chunk, not the answers to earlier messages in the same run.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from psycopg2.extras import execute_values
+
+from src.database import get_pooled_connection
+from src.graph_builder import get_graph_app
+
+logger = logging.getLogger(__name__)
+
+def read_items(lines: Iterable[str]) -> Iterator[dict]:
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        message = record.get("message") or record.get("text") or record.get("title")
+        if not message:
+            continue
+        # Histories are keyed by the integer user_id the database returns.
+        user_id = record.get("user_id")
+        if user_id is not None:
+            user_id = int(user_id)
+        yield {"index": index, "id": record.get("id"), "user_id": user_id, "message": message}
+
+def fetch_histories(conn, user_ids: List[int]) -> Dict[int, List[BaseMessage]]:
+    """Loads the history of every user in a chunk with one query."""
+    histories = {user_id: [] for user_id in user_ids}
+    if not user_ids:
+        return histories
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT user_id, message, response FROM ChatbotHistory WHERE user_id = ANY(%s) ORDER BY user_id, interaction_time ASC",
+            (user_ids,),
+        )
+        for user_id, message, response in cur:
+            if message:
+                histories[user_id].append(HumanMessage(content=message))
+            if response:
+                histories[user_id].append(AIMessage(content=response))
+    conn.commit()
+    return histories
+
+def save_interactions(conn, rows: List[tuple]):
+    if rows:
+        with conn.cursor() as cur:
+            execute_values(cur, "INSERT INTO ChatbotHistory (user_id, message, response, interaction_time) VALUES %s", rows)
+        conn.commit()
+
+def _graph_input(history: List[BaseMessage], message: str) -> dict:
+    return {
+        "messages": history + [HumanMessage(content=message)],
+        "user_query": None, "current_date": None, "available_locations": None,
+        "extracted_entities": None, "search_results": None,
+        "final_response": None, "error": None,
+        "routing_decision": None,
+    }
+
+def run_batch(items: Iterable[dict], concurrency: int = 8, chunk_size: int = 200,
+              use_history: bool = True, save: bool = False, conn=None) -> Iterator[dict]:
+    """Yields one result dict per item, in completion order within each chunk.
+
+    `conn` is used for the history reads and writes of the whole run; graph
+    nodes keep using the shared pool. LLM calls from concurrent items are
+    bounded by `concurrency` and by the LLM client's own limiter.
+    """
+    graph_app = get_graph_app()
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            return
+        histories = {}
+        if use_history and conn is not None:
+            histories = fetch_histories(conn, sorted({item["user_id"] for item in chunk if item["user_id"] is not None}))
+
+        inputs = [_graph_input(histories.get(item["user_id"], []), item["message"]) for item in chunk]
+        to_save = []
+        for position, output in graph_app.batch_as_completed(
+            inputs, config={"max_concurrency": concurrency}, return_exceptions=True
+        ):
+            item = chunk[position]
+            result = {"index": item["index"], "id": item["id"], "user_id": item["user_id"], "message": item["message"]}
+            if isinstance(output, Exception):
+                result["error"] = f"{type(output).__name__}: {output}"
+            else:
+                result.update({
+                    "response": output.get("final_response"),
+                    "route": output.get("routing_decision"),
+                    "entities": output.get("extracted_entities"),
+                    "results": len(output.get("search_results") or []),
+                    "llm_calls_avoided": output.get("llm_calls_avoided", 0),
+                    "error": output.get("error"),
+                })
+                if save and item["user_id"] is not None and result["response"]:
+                    to_save.append((item["user_id"], item["message"], result["response"], datetime.now(timezone.utc)))
+            yield result
+        if save and conn is not None:
+            save_interactions(conn, to_save)
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="NDJSON/JSONL file of messages, or - for stdin.")
+    parser.add_argument("-o", "--output", help="File to write results to (default: stdout).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Messages processed in parallel.")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Messages read (and histories fetched) at a time.")
+    parser.add_argument("--no-history", action="store_true", help="Ignore stored conversation history.")
+    parser.add_argument("--save", action="store_true", help="Store the answers in ChatbotHistory.")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    count = errors = 0
+    try:
+        needs_db = args.save or not args.no_history
+        with get_pooled_connection() if needs_db else contextlib.nullcontext() as conn:
+            for result in run_batch(read_items(source), args.concurrency, args.chunk_size,
+                                    use_history=not args.no_history, save=args.save, conn=conn):
+                out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                count += 1
+                errors += bool(result.get("error"))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Processed {count} messages ({errors} with errors) in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f}/s).", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import logging
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from .config import CACHE_BACKEND, CACHE_URL, CACHE_MAX_ENTRIES
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+class InProcessCache:
+    """Per-process LRU; only suitable with a single uvicorn worker."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+SHM_DIR = "/dev/shm"
+
+def _private_directory(path: str) -> str:
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Cache directory {path} must be a directory owned by uid {os.getuid()} with mode 0700")
+    return path
+
+def _check_owner(path: str):
+    # Values are unpickled, so a file someone else can write is code execution.
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"Cache file {path} is owned by uid {info.st_uid}, not {os.getuid()}")
+
+class SQLiteCache:
+    """Cache shared by every process on the host through one SQLite file.
+
+    The default location is a per-user 0700 directory under /dev/shm when
+    available, so the file lives in shared memory rather than on disk. A
+    database file owned by another user is refused.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000):
+        if not path:
+            root = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+            directory = _private_directory(os.path.join(root, f"travel_chatbot-{os.getuid()}"))
+            path = os.path.join(directory, "cache.sqlite")
+        _check_owner(path)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at),
+        )
+        # Trim occasionally rather than on every write.
+        if hash(key) % 64 == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache WHERE key NOT IN (SELECT key FROM cache ORDER BY rowid DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO counters (key, value) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+                (key,),
+            )
+            value = conn.execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def get_counter(self, key: str) -> int:
+        row = self._connect().execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+class RedisCache:
+    """Cache on any Redis-protocol server; `client` accepts a stand-in such as fakeredis."""
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "travel_chatbot:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("CACHE_BACKEND=redis requires the 'redis' package.")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        value = self.client.get(self.prefix + key)
+        return MISSING if value is None else pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(
+            self.prefix + key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            px=int(ttl * 1000) if ttl else None,
+        )
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def get_counter(self, key: str) -> int:
+        value = self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+def create_cache_backend(backend: Optional[str] = None, url: Optional[str] = None):
+    backend = (backend or CACHE_BACKEND).lower()
+    url = url if url is not None else CACHE_URL
+    if backend == "memory":
+        return InProcessCache(CACHE_MAX_ENTRIES)
+    if backend == "sqlite":
+        return SQLiteCache(url, CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        if url and url.startswith("fakeredis://"):
+            import fakeredis
+            return RedisCache(client=fakeredis.FakeRedis())
+        return RedisCache(url)
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}'. Expected one of: memory, sqlite, redis")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_cache_backend()
+    return _backend
+
+class Cache:
+    """A namespace within the shared backend.
+
+    Keys are prefixed with the namespace's generation counter, which lives
+    in the backend too; invalidate() bumps it, so every worker sharing the
+    backend drops the whole namespace at once without scanning keys.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._backend = backend
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else get_cache_backend()
+
+    def _key(self, key: str) -> str:
+        generation = self.backend.get_counter(f"gen:{self.namespace}")
+        return f"{self.namespace}:{generation}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.backend.get(self._key(key))
+        return default if value is MISSING else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.backend.set(self._key(key), value, ttl if ttl is not None else self.ttl)
+
+    def delete(self, key: str):
+        self.backend.delete(self._key(key))
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Returns the cached value for `key`, calling `loader` on a miss.
+
+        Concurrent misses for the same key in this process are coalesced:
+        one caller runs the loader and the others wait for its result.
+        Values failing `cacheable` (by default None, i.e. the loader failed)
+        are returned but not stored. A namespace with ttl <= 0 stores
+        nothing but still coalesces.
+        """
+        enabled = self.ttl is None or self.ttl > 0
+        # The generation is resolved once: a load that started before an
+        # invalidate() stores under the old generation, where nobody reads it,
+        # and callers arriving after the invalidate() do not join it.
+        try:
+            full_key = self._key(key)
+            value = self.backend.get(full_key) if enabled else MISSING
+        except Exception as e:
+            logger.warning("Cache %s lookup failed: %s", self.namespace, e)
+            full_key, value = None, MISSING
+        if value is not MISSING:
+            CACHE_REQUESTS.inc(cache=self.namespace, result="hit")
+            return value
+
+        inflight_key = full_key if full_key is not None else f"{self.namespace}:?:{key}"
+        with self._inflight_lock:
+            future = self._inflight.get(inflight_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[inflight_key] = Future()
+        if not leader:
+            CACHE_REQUESTS.inc(cache=self.namespace, result="coalesced")
+            return future.result()
+
+        CACHE_REQUESTS.inc(cache=self.namespace, result="miss")
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[inflight_key]
+
+        if enabled and full_key is not None and (cacheable(value) if cacheable else value is not None):
+            try:
+                self.backend.set(full_key, value, ttl if ttl is not None else self.ttl)
+            except Exception as e:
+                logger.warning("Cache %s store failed: %s", self.namespace, e)
+        return value
+
+    def invalidate(self):
+        self.backend.incr(f"gen:{self.namespace}")
@@ -0,0 +1,193 @@
+import json
+import logging
+import select
+import sys
+import threading
+import time
+import psycopg2
+from .config import CACHE_NOTIFY_CHANNEL
+from .database import DATABASE_URL, get_pooled_connection
+
+logger = logging.getLogger(__name__)
+
+WATCHED_TABLES = ("Tour", "Departure", "Promotion", "Tour_Promotion")
+TRIGGER_NAMES = tuple(f"{table.lower()}_catalog_change" for table in WATCHED_TABLES)
+PROMOTION_TABLES = {None, "departure", "promotion", "tour_promotion"}
+
+TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION notify_tour_catalog_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+BEGIN
+    IF TG_LEVEL = 'ROW' THEN
+        row_data := CASE WHEN TG_OP = 'DELETE' THEN to_jsonb(OLD) ELSE to_jsonb(NEW) END;
+    END IF;
+    PERFORM pg_notify(TG_ARGV[0], json_build_object(
+        'table', lower(TG_TABLE_NAME),
+        'op', TG_OP,
+        'tour_id', row_data->'tour_id',
+        'departure_id', row_data->'departure_id',
+        'promotion_id', row_data->'promotion_id'
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS {table}_catalog_change ON {table};
+CREATE TRIGGER {table}_catalog_change
+    AFTER INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION notify_tour_catalog_change('{channel}');
+DROP TRIGGER IF EXISTS {table}_catalog_truncate ON {table};
+CREATE TRIGGER {table}_catalog_truncate
+    AFTER TRUNCATE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_tour_catalog_change('{channel}');
+"""
+
+def install_triggers(channel: str = CACHE_NOTIFY_CHANNEL):
+    with get_pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(TRIGGER_FUNCTION_SQL)
+            for table in WATCHED_TABLES:
+                cur.execute(TRIGGER_SQL.format(table=table, channel=channel))
+
+def apply_changes(changes, refresh_promotions: bool = True):
+    """Invalidates what a batch of catalog change notifications affects.
+
+    Tour rows change the locations list (refreshed eagerly) and the NER
+    prompt built from it; departure and tour-promotion rows only touch their
+    own tour; a promotion row can apply to any tour. Anything that can change
+    a departure's best promotion refreshes the precomputed view, when
+    `refresh_promotions` is set. Cached search results are dropped on any
+    change.
+    """
+    from .tools import locations_cache, entities_cache, tours_cache, search_cache, fetch_locations_tool
+    from .promotions import refresh_best_promotions
+
+    tables = {change.get("table") for change in changes}
+    if refresh_promotions and tables & PROMOTION_TABLES:
+        refresh_best_promotions()
+    search_cache.invalidate()
+    if None in tables or "promotion" in tables or any(c.get("op") == "TRUNCATE" for c in changes):
+        tours_cache.invalidate()
+    else:
+        for tour_id in {c.get("tour_id") for c in changes if c.get("tour_id") is not None}:
+            tours_cache.delete(str(tour_id))
+
+    if None in tables or "tour" in tables:
+        locations_cache.invalidate()
+        entities_cache.invalidate()
+        fetch_locations_tool()
+
+def invalidate_all(refresh_promotions: bool = True):
+    apply_changes([{}], refresh_promotions)
+
+class CacheInvalidationListener(threading.Thread):
+    """LISTENs on a dedicated connection and applies catalog changes.
+
+    Notifications arriving within `debounce` seconds are applied as one
+    batch. After a reconnect everything is invalidated, since changes made
+    while disconnected were never delivered.
+
+    Every worker's listener drops its own caches, but only one per database
+    refreshes the promotion view: the first to take a session advisory lock
+    on its LISTEN connection keeps that role until its connection closes.
+    """
+
+    def __init__(self, dsn: str = DATABASE_URL, channel: str = CACHE_NOTIFY_CHANNEL,
+                 debounce: float = 0.2, reconnect_delay: float = 5.0):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.dsn = dsn
+        self.channel = channel
+        self.debounce = debounce
+        self.reconnect_delay = reconnect_delay
+        self.notifications = 0
+        self._stop_event = threading.Event()
+        self._conn = None
+        self._refresh_leader = False
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}";')
+        return conn
+
+    def _claim_refresh(self) -> bool:
+        if not self._refresh_leader:
+            from .promotions import REFRESH_LEADER_LOCK_KEY
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (REFRESH_LEADER_LOCK_KEY,))
+                self._refresh_leader = cur.fetchone()[0]
+        return self._refresh_leader
+
+    def _drain(self, conn):
+        changes = []
+        deadline = None
+        while not self._stop_event.is_set():
+            timeout = 1.0 if deadline is None else max(0.0, deadline - time.monotonic())
+            if select.select([conn], [], [], timeout) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        changes.append(json.loads(notify.payload))
+                    except ValueError:
+                        changes.append({})
+                if changes and deadline is None:
+                    deadline = time.monotonic() + self.debounce
+            elif deadline is not None:
+                return changes
+        return changes
+
+    def run(self):
+        first_attempt = True
+        while not self._stop_event.is_set():
+            try:
+                self._refresh_leader = False
+                self._conn = self._connect()
+                if not first_attempt:
+                    invalidate_all(self._claim_refresh())
+                while not self._stop_event.is_set():
+                    changes = self._drain(self._conn)
+                    if changes:
+                        self.notifications += len(changes)
+                        apply_changes(changes, self._claim_refresh())
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning("Cache invalidation listener disconnected: %s", e)
+                self._stop_event.wait(self.reconnect_delay)
+            finally:
+                first_attempt = False
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+
+    def stop(self):
+        self._stop_event.set()
+
+_listener = None
+
+def start_listener():
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = CacheInvalidationListener()
+        _listener.start()
+    return _listener
+
+def stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["install"]:
+        install_triggers()
+        print(f"Installed catalog change triggers on {', '.join(WATCHED_TABLES)} (channel '{CACHE_NOTIFY_CHANNEL}').")
+    else:
+        print("Usage: python -m src.cache_listener install")
+        sys.exit(2)
@@ -10,8 +10,67 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_ENDPOINT_ID = os.getenv("DB_ENDPOINT_ID")
+# Transaction-mode poolers (e.g. Neon's "-pooler" endpoints) do not keep
+# session-level prepared statements, so they are off by default there.
+DB_PREPARED_STATEMENTS = (os.getenv("DB_PREPARED_STATEMENTS") or ("false" if "-pooler" in DB_HOST else "true")).lower() == "true"
+DB_MAX_PREPARED_STATEMENTS = int(os.getenv("DB_MAX_PREPARED_STATEMENTS", "64"))
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+RESPONSE_TEMPLATES = [t.strip() for t in os.getenv("RESPONSE_TEMPLATES", "no_results,single_tour,price_list").split(",") if t.strip()]
+SPECULATIVE_EXECUTION = os.getenv("SPECULATIVE_EXECUTION", "false").lower() == "true"
 
-if not GOOGLE_API_KEY:
+JWT_SECRET = os.getenv("JWT_SECRET")
+# hmac (standard library HS256) or jose (python-jose)
+JWT_VERIFIER = os.getenv("JWT_VERIFIER", "hmac")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_HEDGE_AFTER = os.getenv("LLM_HEDGE_AFTER", "").lower() or None
+if LLM_HEDGE_AFTER and LLM_HEDGE_AFTER != "p95":
+    LLM_HEDGE_AFTER = float(LLM_HEDGE_AFTER)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0")) or None
+LLM_RATE_BURST = float(os.getenv("LLM_RATE_BURST", "0")) or None
+
+# /api/chat/ admission control: the in-flight limit moves between MIN and MAX,
+# growing while the slowest LLM call of a request stays under the target (seconds)
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "8"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "1"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "32"))
+ADMISSION_LATENCY_TARGET = float(os.getenv("ADMISSION_LATENCY_TARGET", "5"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "10"))
+# Seconds to wait for a free pooled connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_TORCH_THREADS = int(os.getenv("EMBEDDING_TORCH_THREADS", "1"))
+EMBEDDING_BUFFER_BYTES = int(os.getenv("EMBEDDING_BUFFER_BYTES", str(4 * 1024 * 1024)))
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+
+# memory (per process), sqlite (shared by workers on one host) or redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+LOCATIONS_CACHE_TTL = float(os.getenv("LOCATIONS_CACHE_TTL", "86400"))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "3600"))
+TOUR_CACHE_TTL = float(os.getenv("TOUR_CACHE_TTL", "600"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+CACHE_INVALIDATION_LISTENER = os.getenv("CACHE_INVALIDATION_LISTENER", "true").lower() == "true"
+CACHE_NOTIFY_CHANNEL = os.getenv("CACHE_NOTIFY_CHANNEL", "tour_catalog_changes")
+
+HISTORY_ARCHIVE_DAYS = int(os.getenv("HISTORY_ARCHIVE_DAYS", "90"))
+HISTORY_ARCHIVE_BATCH_SIZE = int(os.getenv("HISTORY_ARCHIVE_BATCH_SIZE", "10000"))
+# Each running export holds its own database connection, outside the pool
+HISTORY_EXPORT_CONCURRENCY = int(os.getenv("HISTORY_EXPORT_CONCURRENCY", "2"))
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_COMPONENTS = [c.strip() for c in os.getenv("WARMUP_COMPONENTS", "database,llm,graph,embedding").split(",") if c.strip()]
+
+if LLM_BACKEND == "gemini" and not GOOGLE_API_KEY:
     raise ValueError("Missing GOOGLE_API_KEY in .env file")
 if not DB_NAME or not DB_USER or not DB_HOST or not DB_PORT:
     raise ValueError("Missing Database Credentials (DB_NAME, DB_USER, DB_HOST, DB_PORT) in .env file")
\ No newline at end of file
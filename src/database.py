@@ -1,35 +1,146 @@
 import os
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections.abc import Mapping
 import psycopg2
 from psycopg2 import pool
-from psycopg2.extras import DictCursor
 from contextlib import contextmanager
 from .config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, DB_ENDPOINT_ID
+from .config import DB_PREPARED_STATEMENTS, DB_MAX_PREPARED_STATEMENTS, DB_POOL_MAX_CONNECTIONS, DB_POOL_TIMEOUT
+from .metrics import DB_QUERY_LATENCY, DB_QUERY_ROWS, DB_QUERY_ERRORS, DB_POOL_WAIT, DB_POOL_TIMEOUTS, span
 
-conn_pool = None
-try:
-    if DB_ENDPOINT_ID:
-        DATABASE_URL = (
-            f"postgresql://{DB_USER}:{DB_PASSWORD}"
-            f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-            f"?sslmode=require"
-        )
-    else:
-        DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+logger = logging.getLogger(__name__)
 
-    conn_pool = pool.SimpleConnectionPool(
-        minconn=1,
-        maxconn=10,
-        dsn=DATABASE_URL
+if DB_ENDPOINT_ID:
+    DATABASE_URL = (
+        f"postgresql://{DB_USER}:{DB_PASSWORD}"
+        f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        f"?sslmode=require"
     )
+else:
+    DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+POOL_RETRY_SECONDS = 5.0
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements it has PREPAREd.
+
+    Prepared statements live for the session, so the pool's connections
+    keep them across checkouts. After a failed query the set is discarded
+    and the session's statements deallocated on next use, since the failure
+    may have come from a statement whose plan no longer applies.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.prepared_stale = False
+
+class Record(Mapping):
+    """A read-only result row keyed by column name.
+
+    Subclasses are created per column set by record_type(); instances keep
+    the cursor's tuple as is, without a per-row dict. Iteration, len() and
+    equality follow the mapping, as for a dict; json.dumps needs
+    default=dict. replace() returns a copy with some columns changed.
+    """
+
+    __slots__ = ("_values",)
+    _columns = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = tuple(values)
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else self._values[index]
+
+    def replace(self, **changes):
+        values = list(self._values)
+        for key, value in changes.items():
+            values[self._index[key]] = value
+        return type(self)(values)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __reduce__(self):
+        return (_make_record, (self._columns, self._values))
 
-except (psycopg2.OperationalError, Exception) as e:
-    conn_pool = None
+_record_types = {}
+
+def record_type(columns):
+    columns = tuple(columns)
+    cls = _record_types.get(columns)
+    if cls is None:
+        cls = type("Record", (Record,), {
+            "__slots__": (),
+            "_columns": columns,
+            "_index": {column: i for i, column in enumerate(columns)},
+        })
+        _record_types[columns] = cls
+    return cls
+
+def _make_record(columns, values):
+    return record_type(columns)(values)
+
+class PoolTimeout(Exception):
+    """No pooled connection became free in time; the server is overloaded."""
+
+conn_pool = None
+# ThreadedConnectionPool.getconn() fails at once when every connection is
+# out; checkouts wait on this instead, up to a deadline.
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS)
+_pool_lock = threading.Lock()
+_pool_retry_at = 0.0
+
+def get_conn_pool():
+    # The pool is opened on first use rather than at import; a failed attempt
+    # is retried after POOL_RETRY_SECONDS instead of disabling the DB for good.
+    global conn_pool, _pool_retry_at
+    if conn_pool is not None or time.monotonic() < _pool_retry_at:
+        return conn_pool
+    with _pool_lock:
+        if conn_pool is None and time.monotonic() >= _pool_retry_at:
+            try:
+                conn_pool = pool.ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=DB_POOL_MAX_CONNECTIONS,
+                    dsn=DATABASE_URL,
+                    connection_factory=PreparingConnection,
+                )
+            except (psycopg2.OperationalError, Exception) as e:
+                logger.warning("Could not open database pool: %s", e)
+                _pool_retry_at = time.monotonic() + POOL_RETRY_SECONDS
+    return conn_pool
 
 @contextmanager
-def get_pooled_connection():
+def get_pooled_connection(timeout: float = DB_POOL_TIMEOUT):
+    conn_pool = get_conn_pool()
     if conn_pool is None:
         raise ConnectionError("Database connection pool is not initialized.")
 
+    start = time.perf_counter()
+    if not _pool_slots.acquire(timeout=timeout):
+        DB_POOL_TIMEOUTS.inc()
+        raise PoolTimeout(f"No database connection free after {timeout:g}s")
+    DB_POOL_WAIT.observe(time.perf_counter() - start)
     conn = None
     try:
         conn = conn_pool.getconn()
@@ -48,30 +159,83 @@ def get_pooled_connection():
                 conn_pool.putconn(conn)
             except Exception as pc_err:
                 pass
+        _pool_slots.release()
 
-def execute_query(query: str, params: tuple = None, fetch_one: bool = False):
-    if conn_pool is None:
+_PLACEHOLDER = re.compile(r"%(s|%)")
+
+def _prepare_statement(cur, name: str, query: str, params) -> str:
+    """PREPAREs `query` on the cursor's connection if needed; returns the EXECUTE text.
+
+    The statement name is derived from the SQL text, so each distinct
+    filter shape maps to exactly one server-side statement per connection.
+    Returns None when the connection already holds the maximum number of
+    statements and the query should run unprepared.
+    """
+    conn = cur.connection
+    if conn.prepared_stale:
+        cur.execute("DEALLOCATE ALL")
+        conn.prepared.clear()
+        conn.prepared_stale = False
+
+    statement = f"{name}_{hashlib.md5(query.encode()).hexdigest()[:12]}"
+    if statement not in conn.prepared:
+        if len(conn.prepared) >= DB_MAX_PREPARED_STATEMENTS:
+            return None
+        counter = iter(range(1, len(params or ()) + 1))
+        positional = _PLACEHOLDER.sub(lambda m: f"${next(counter)}" if m.group(1) == "s" else "%", query)
+        cur.execute(f"PREPARE {statement} AS {positional.strip().rstrip(';')}")
+        conn.prepared.add(statement)
+    if not params:
+        return f"EXECUTE {statement}"
+    return f"EXECUTE {statement} ({', '.join(['%s'] * len(params))})"
+
+def execute_query(query: str, params: tuple = None, fetch_one: bool = False, name: str = "query", prepared: bool = None):
+    if get_conn_pool() is None:
         return None
 
+    if prepared is None:
+        prepared = DB_PREPARED_STATEMENTS
     results = None
     try:
-        with get_pooled_connection() as conn:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute(query, params)
-
-                if fetch_one:
-                    result_dict = cur.fetchone()
-                    results = dict(result_dict) if result_dict else None
-                else:
-                    results_list = cur.fetchall()
-                    results = [dict(row) for row in results_list]
+        with span(f"db.{name}", DB_QUERY_LATENCY, query=name):
+            with get_pooled_connection() as conn:
+                with conn.cursor() as cur:
+                    try:
+                        execute = _prepare_statement(cur, name, query, params) if prepared else None
+                        if execute is not None:
+                            cur.execute(execute, params)
+                        else:
+                            cur.execute(query, params)
+                    except psycopg2.Error:
+                        if prepared:
+                            conn.prepared_stale = True
+                        raise
+
+                    make_record = record_type(column.name for column in cur.description)
+                    if fetch_one:
+                        row = cur.fetchone()
+                        results = make_record(row) if row else None
+                    else:
+                        results = list(map(make_record, cur.fetchall()))
+        DB_QUERY_ROWS.inc(len(results) if isinstance(results, list) else int(results is not None), query=name)
         return results
 
+    except PoolTimeout:
+        # Not a query failure: overload is reported to the caller rather
+        # than turned into an empty result.
+        DB_QUERY_ERRORS.inc(query=name)
+        raise
     except ConnectionError as e:
+        DB_QUERY_ERRORS.inc(query=name)
+        logger.warning("Query %s failed: %s", name, e)
         return None
     except psycopg2.Error as e:
+        DB_QUERY_ERRORS.inc(query=name)
+        logger.warning("Query %s failed: %s", name, e)
         return None
     except Exception as e:
+        DB_QUERY_ERRORS.inc(query=name)
+        logger.exception("Query %s failed", name)
         return None
 
 def get_available_locations():
@@ -81,7 +245,7 @@ def get_available_locations():
         WHERE availability = true
         ORDER BY destination;
     """
-    results = execute_query(query)
+    results = execute_query(query, name="available_locations")
     if results:
         return [row['destination'] for row in results]
     elif results == []:
@@ -90,6 +254,7 @@ def get_available_locations():
         return None
 
 def get_tour_by_id(tour_id):
+    from .promotions import PROMOTION_COLUMNS, best_promotion_join
     query = """
     SELECT
         t.tour_id,
@@ -104,27 +269,19 @@ def get_tour_by_id(tour_id):
         d.start_date,
         d.price_adult,
         d.price_child_120_140,
-        d.price_child_100_120,
-        p.promotion_id,
-        p.name AS promotion_name,
-        p.type AS promotion_type,
-        p.discount AS promotion_discount,
-        p.start_date AS promotion_start_date,
-        p.end_date AS promotion_end_date
+        d.price_child_100_120,{promotion_columns}
     FROM Tour t
     LEFT JOIN Departure d ON t.tour_id = d.tour_id AND d.availability = true
-    LEFT JOIN Tour_Promotion tp ON t.tour_id = tp.tour_id
-    LEFT JOIN Promotion p ON tp.promotion_id = p.promotion_id
-        AND CURRENT_DATE BETWEEN p.start_date AND p.end_date
-        AND p.status = 'active'
+    {promotion_join}
     WHERE t.tour_id = %s AND t.availability = true
     ORDER BY d.start_date
     LIMIT 1;
-    """
-    result = execute_query(query, (tour_id,), fetch_one=True)
+    """.format(promotion_columns=PROMOTION_COLUMNS, promotion_join=best_promotion_join("CURRENT_DATE"))
+    result = execute_query(query, (tour_id,), fetch_one=True, name="tour_by_id")
     return result
 
-def search_tours_db(entities: dict):
+def build_search_query(entities: dict):
+    from .promotions import PROMOTION_COLUMNS, EFFECTIVE_PRICE_SQL, best_promotion_join
     base_query = """
     SELECT
         t.tour_id,
@@ -139,21 +296,12 @@ def search_tours_db(entities: dict):
         d.start_date,
         d.price_adult,
         d.price_child_120_140,
-        d.price_child_100_120,
-        p.promotion_id,
-        p.name AS promotion_name,
-        p.type AS promotion_type,
-        p.discount AS promotion_discount,
-        p.start_date AS promotion_start_date,
-        p.end_date AS promotion_end_date
+        d.price_child_100_120,{promotion_columns}
     FROM Departure d
     JOIN Tour t ON d.tour_id = t.tour_id
-    LEFT JOIN Tour_Promotion tp ON t.tour_id = tp.tour_id
-    LEFT JOIN Promotion p ON tp.promotion_id = p.promotion_id
-        AND d.start_date BETWEEN p.start_date AND p.end_date
-        AND p.status = 'active'
+    {promotion_join}
     WHERE t.availability = true AND d.availability = true
-    """
+    """.format(promotion_columns=PROMOTION_COLUMNS, promotion_join=best_promotion_join("d.start_date"))
     filters = []
     params = []
 
@@ -174,11 +322,14 @@ def search_tours_db(entities: dict):
         time_filter_parts = []
         time_info = entities['time']
         if not isinstance(time_info, list): time_info = [time_info]
+        # Exact dates first, then ranges: the SQL text (and so the prepared
+        # statement) depends only on how many of each there are.
         for time_obj in time_info:
             if 'departure_date' in time_obj:
                 time_filter_parts.append("d.start_date = %s")
                 params.append(time_obj['departure_date'])
-            elif 'start_date' in time_obj and 'end_date' in time_obj:
+        for time_obj in time_info:
+            if 'departure_date' not in time_obj and 'start_date' in time_obj and 'end_date' in time_obj:
                 time_filter_parts.append("d.start_date BETWEEN %s AND %s")
                 params.extend([time_obj['start_date'], time_obj['end_date']])
         if time_filter_parts: filters.append(f"({' OR '.join(time_filter_parts)})")
@@ -188,11 +339,11 @@ def search_tours_db(entities: dict):
         try:
             if '-' in budget:
                 min_price, max_price = map(float, budget.split('-'))
-                filters.append("d.price_adult BETWEEN %s AND %s")
+                filters.append(f"{EFFECTIVE_PRICE_SQL} BETWEEN %s AND %s")
                 params.extend([min_price, max_price])
             else:
                 max_price = float(budget)
-                filters.append("d.price_adult <= %s")
+                filters.append(f"{EFFECTIVE_PRICE_SQL} <= %s")
                 params.append(max_price)
         except ValueError:
             pass
@@ -214,8 +365,11 @@ def search_tours_db(entities: dict):
         base_query += " AND " + " AND ".join(filters)
 
     base_query += " ORDER BY d.start_date, t.title;"
+    return base_query, tuple(params)
 
-    results = execute_query(base_query, tuple(params))
+def search_tours_db(entities: dict):
+    query, params = build_search_query(entities)
+    results = execute_query(query, params, name="search_tours")
 
     if results is None:
         return []
@@ -1,18 +1,21 @@
-from sentence_transformers import SentenceTransformer
-import numpy as np
+import threading
 from typing import List, Union
 
 class EmbeddingModel:
     def __init__(self):
         self.model = None
         self.model_name = 'keepitreal/vietnamese-sbert'
+        self._lock = threading.Lock()
         
     def load_model(self):
         if self.model is None:
-            try:
-                self.model = SentenceTransformer(self.model_name)
-            except Exception as e:
-                raise RuntimeError(f"Failed to load model: {str(e)}")
+            with self._lock:
+                if self.model is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self.model = SentenceTransformer(self.model_name)
+                    except Exception as e:
+                        raise RuntimeError(f"Failed to load model: {str(e)}")
     
     def get_embedding(self, text: Union[str, List[str]]) -> List[List[float]]:
         if self.model is None:
@@ -27,4 +30,4 @@ class EmbeddingModel:
         except Exception as e:
             raise RuntimeError(f"Failed to generate embeddings: {str(e)}")
 
-embedding_model = EmbeddingModel()
\ No newline at end of file
+embedding_model = EmbeddingModel()
@@ -0,0 +1,274 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import List, Union
+from .config import EMBEDDING_WORKERS, EMBEDDING_TORCH_THREADS, EMBEDDING_BUFFER_BYTES
+
+logger = logging.getLogger(__name__)
+
+def _worker_main(worker_id, torch_threads, conn, shm_name, buffer_free, model_class=None):
+    # Thread caps must be in place before torch is imported.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+    try:
+        import numpy as np
+        if model_class is None:
+            from src.embedding import EmbeddingModel as model_class
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+        model = model_class()
+        model.load_model()
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except Exception as e:
+        conn.send(("failed", None, str(e)))
+        return
+
+    conn.send(("ready", None, model.model_name))
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        request_id, texts = item
+        try:
+            embeddings = np.ascontiguousarray(model.model.encode(texts), dtype=np.float32)
+        except Exception as e:
+            conn.send(("error", request_id, str(e)))
+            continue
+
+        if embeddings.nbytes <= shm.size:
+            # Wait until the parent has copied the previous result out.
+            buffer_free.acquire()
+            np.ndarray(embeddings.shape, dtype=np.float32, buffer=shm.buf)[...] = embeddings
+            conn.send(("shm", request_id, embeddings.shape))
+        else:
+            conn.send(("inline", request_id, embeddings))
+    shm.close()
+
+class _Worker:
+    def __init__(self, worker_id, process, conn, buffer, buffer_free):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.buffer = buffer
+        self.buffer_free = buffer_free
+        self.pending = {}
+        self.ready = False
+        self.send_lock = threading.Lock()
+
+class EmbeddingWorkerPool:
+    """Runs EmbeddingModel in separate processes so torch stays off the API process.
+
+    Each worker has its own pipe for requests and its own shared-memory
+    buffer for results; the parent copies a result out before the worker may
+    reuse the buffer. Results larger than the buffer are pickled through the
+    pipe instead. A worker that dies fails its in-flight requests and is
+    restarted; one that dies before loading the model is restarted after a
+    backoff that doubles on each consecutive failure, up to `respawn_max`.
+    `model_class` defaults to src.embedding.EmbeddingModel and must be
+    importable by the worker processes.
+    """
+
+    def __init__(self, workers: int = 1, torch_threads: int = 1, buffer_bytes: int = 4 * 1024 * 1024,
+                 respawn_backoff: float = 1.0, respawn_max: float = 60.0, model_class=None):
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self.buffer_bytes = buffer_bytes
+        self.respawn_backoff = respawn_backoff
+        self.respawn_max = respawn_max
+        self.model_class = model_class
+        self.model_name = None
+        self.failed = {}
+        self._ids = itertools.count()
+        self._workers = {}
+        self._start_failures = {}
+        self._respawn_at = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._closing = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._context = multiprocessing.get_context("spawn")
+            for worker_id in range(self.workers):
+                self._workers[worker_id] = self._spawn(worker_id)
+            self._closing = False
+            self._started = True
+            self._reader = threading.Thread(target=self._read_results, name="embedding-results", daemon=True)
+            self._reader.start()
+
+    def _spawn(self, worker_id: int) -> _Worker:
+        buffer = shared_memory.SharedMemory(create=True, size=self.buffer_bytes)
+        buffer_free = self._context.Semaphore(1)
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self.torch_threads, child_conn, buffer.name, buffer_free, self.model_class),
+            name=f"embedding-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(worker_id, process, parent_conn, buffer, buffer_free)
+
+    def _retire(self, worker: _Worker, error: Exception):
+        worker.conn.close()
+        worker.buffer.close()
+        worker.buffer.unlink()
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        worker.pending.clear()
+
+    def _schedule_respawn(self, worker_id: int):
+        failures = self._start_failures.get(worker_id, 0) + 1
+        self._start_failures[worker_id] = failures
+        delay = min(self.respawn_max, self.respawn_backoff * 2 ** (failures - 1))
+        self._respawn_at[worker_id] = time.monotonic() + delay
+        logger.warning("Embedding worker %s failed to start %s time(s), retrying in %.1fs",
+                       worker_id, failures, delay)
+
+    def _respawn_due(self):
+        now = time.monotonic()
+        with self._lock:
+            for worker_id, due in list(self._respawn_at.items()):
+                if due <= now and not self._closing:
+                    del self._respawn_at[worker_id]
+                    self._workers[worker_id] = self._spawn(worker_id)
+
+    def _read_results(self):
+        import numpy as np
+        while not self._closing:
+            if self._respawn_at:
+                self._respawn_due()
+            workers = {worker.conn: worker for worker in list(self._workers.values())}
+            for conn in wait(list(workers), timeout=0.2):
+                worker = workers[conn]
+                try:
+                    kind, request_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    if self._closing:
+                        return
+                    worker.process.join(timeout=1)
+                    logger.warning("Embedding worker %s exited (code %s), restarting",
+                                   worker.worker_id, worker.process.exitcode)
+                    with self._lock:
+                        self._retire(worker, RuntimeError("Embedding worker exited while processing the request"))
+                        if worker.ready:
+                            self._workers[worker.worker_id] = self._spawn(worker.worker_id)
+                        else:
+                            del self._workers[worker.worker_id]
+                            self.failed.setdefault(worker.worker_id, f"exit code {worker.process.exitcode}")
+                            self._schedule_respawn(worker.worker_id)
+                    continue
+
+                if kind == "ready":
+                    self.model_name = payload
+                    worker.ready = True
+                    self.failed.pop(worker.worker_id, None)
+                    self._start_failures.pop(worker.worker_id, None)
+                    continue
+                if kind == "failed":
+                    self.failed[worker.worker_id] = payload
+                    logger.error("Embedding worker %s failed to start: %s", worker.worker_id, payload)
+                    continue
+
+                future = worker.pending.pop(request_id, None)
+                if kind == "shm":
+                    view = np.ndarray(payload, dtype=np.float32, buffer=worker.buffer.buf)
+                    embeddings = view.tolist()
+                    del view
+                    worker.buffer_free.release()
+                elif kind == "inline":
+                    embeddings = payload.tolist()
+
+                if future is None or future.done():
+                    continue
+                if kind == "error":
+                    future.set_exception(RuntimeError(f"Failed to generate embeddings: {payload}"))
+                else:
+                    future.set_result(embeddings)
+
+    def submit(self, text: Union[str, List[str]]) -> Future:
+        if not self._started:
+            self.start()
+        with self._lock:
+            if not self._workers:
+                raise RuntimeError(f"Embedding workers unavailable, restarting: {self.failed}")
+            worker = min(self._workers.values(), key=lambda w: len(w.pending))
+            future = Future()
+            request_id = next(self._ids)
+            worker.pending[request_id] = future
+        texts = [text] if isinstance(text, str) else list(text)
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, texts))
+        except (OSError, ValueError) as e:
+            worker.pending.pop(request_id, None)
+            raise RuntimeError(f"Embedding worker unavailable: {e}")
+        return future
+
+    def get_embedding(self, text: Union[str, List[str]], timeout: float = None) -> List[List[float]]:
+        return self.submit(text).result(timeout)
+
+    async def aget_embedding(self, text: Union[str, List[str]], timeout: float = None) -> List[List[float]]:
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(text)), timeout)
+
+    @property
+    def ready(self) -> bool:
+        workers = list(self._workers.values())
+        return self._started and len(workers) == self.workers and all(w.ready for w in workers)
+
+    def wait_ready(self, timeout: float = 300.0):
+        """Waits for every worker to load the model; failed ones keep being retried."""
+        self.start()
+        deadline = time.monotonic() + timeout
+        while not self.ready:
+            if time.monotonic() > deadline:
+                if self.failed:
+                    raise RuntimeError(f"Embedding workers failed to start: {self.failed}")
+                raise TimeoutError(f"Embedding workers not ready after {timeout}s")
+            time.sleep(0.05)
+
+    def close(self):
+        with self._lock:
+            if not self._started:
+                return
+            self._closing = True
+            for worker in self._workers.values():
+                try:
+                    with worker.send_lock:
+                        worker.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+            self._reader.join(timeout=1)
+            for worker in self._workers.values():
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                self._retire(worker, RuntimeError("Embedding pool closed"))
+            self._workers.clear()
+            self._respawn_at.clear()
+            self._start_failures.clear()
+            self._started = False
+
+# EMBEDDING_WORKERS=0 keeps the model in the API process.
+embedding_pool = (
+    EmbeddingWorkerPool(EMBEDDING_WORKERS, EMBEDDING_TORCH_THREADS, EMBEDDING_BUFFER_BYTES)
+    if EMBEDDING_WORKERS > 0 else None
+)
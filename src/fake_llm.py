@@ -0,0 +1,130 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from langchain_core.messages import AIMessage
+
+SEARCH_HINTS = ["tour", "tìm", "đi ", "du lịch", "ngày", "đêm", "tháng", "triệu", "tr ", "giá", "khởi hành"]
+
+def parse_latency(spec: str):
+    """Parse "fixed:0.2", "uniform:0.1:0.5", "normal:0.3:0.05" or
+    "lognormal:0.3:0.5" (median seconds, sigma) into a sampler."""
+    if not spec:
+        return lambda rng: 0.0
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(":") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def _between(text: str, start: str, end: str = "\n") -> str:
+    index = text.rfind(start)
+    if index < 0:
+        return ""
+    value = text[index + len(start):]
+    end_index = value.find(end)
+    return (value if end_index < 0 else value[:end_index]).strip()
+
+class FakeChatModel:
+    """Deterministic stand-in for the Gemini chat model.
+
+    Recognises the routing, NER and response prompts from src.prompts and
+    answers each with a canned output after sleeping for a latency drawn
+    from a seeded distribution. ``route``, ``entities`` and ``response``
+    override the heuristic answers.
+    """
+
+    def __init__(self, latency: str = None, route_latency: str = None, ner_latency: str = None,
+                 response_latency: str = None, seed: int = 0, route: str = None,
+                 entities: dict = None, response: str = None):
+        default = parse_latency(latency)
+        self.latencies = {
+            "route": parse_latency(route_latency) if route_latency else default,
+            "ner": parse_latency(ner_latency) if ner_latency else default,
+            "response": parse_latency(response_latency) if response_latency else default,
+        }
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.route = route
+        self.entities = entities
+        self.response = response
+        self.calls = {"route": 0, "ner": 0, "response": 0}
+
+    def invoke(self, prompt, timeout: float = None):
+        if isinstance(prompt, str):
+            text = prompt
+        else:
+            text = "\n".join(str(getattr(m, "content", m)) for m in prompt)
+
+        if "JSON Output:" in text:
+            kind, content = "ner", self._entities(text)
+        elif "Lựa chọn của bạn:" in text:
+            kind, content = "route", self._route(text)
+        else:
+            kind, content = "response", self._response(text)
+
+        with self.lock:
+            self.calls[kind] += 1
+            delay = self.latencies[kind](self.rng)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"fake LLM call exceeded its {timeout:.2f}s timeout")
+        if delay > 0:
+            time.sleep(delay)
+
+        input_tokens = len(text) // 4
+        output_tokens = len(content) // 4
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+    def _route(self, text: str) -> str:
+        if self.route:
+            return self.route
+        query = _between(text, "Câu hỏi cuối cùng của người dùng:").lower()
+        return "search" if any(hint in query for hint in SEARCH_HINTS) else "respond"
+
+    def _entities(self, text: str) -> str:
+        if self.entities is not None:
+            return json.dumps(self.entities, ensure_ascii=False)
+        query = _between(text, "Câu hỏi:").lower()
+        locations = [l.strip() for l in _between(text, 'Danh sách điểm đến: "', '"').split(",") if l.strip()]
+        entities = {}
+        destinations = [l for l in locations if l.lower() in query]
+        if destinations:
+            entities["destination"] = destinations if len(destinations) > 1 else destinations[0]
+        match = re.search(r"(\d+)\s*ngày", query)
+        if match:
+            entities["duration"] = f"{match.group(1)} ngày"
+        match = re.search(r"(\d+)\s*(triệu|tr\b)", query)
+        if match:
+            entities["budget"] = str(int(match.group(1)) * 1000000)
+        return json.dumps(entities, ensure_ascii=False)
+
+    def _response(self, text: str) -> str:
+        if self.response:
+            return self.response
+        return "Cảm ơn bạn đã hỏi. Đây là câu trả lời mẫu từ mô hình giả lập."
+
+def fake_chat_model_from_env(env) -> FakeChatModel:
+    entities = env.get("FAKE_LLM_ENTITIES")
+    return FakeChatModel(
+        latency=env.get("FAKE_LLM_LATENCY"),
+        route_latency=env.get("FAKE_LLM_ROUTE_LATENCY"),
+        ner_latency=env.get("FAKE_LLM_NER_LATENCY"),
+        response_latency=env.get("FAKE_LLM_RESPONSE_LATENCY"),
+        seed=int(env.get("FAKE_LLM_SEED", "0")),
+        route=env.get("FAKE_LLM_ROUTE") or None,
+        entities=json.loads(entities) if entities else None,
+        response=env.get("FAKE_LLM_RESPONSE") or None,
+    )
@@ -1,15 +1,26 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Sequence, Optional, List
 from datetime import date
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage, SystemMessage
 
+from src.config import SPECULATIVE_EXECUTION, RESPONSE_TEMPLATES
 from src.graph_state import GraphState
 from src.llm import llm
+from src.metrics import traced_node, LLM_CALLS_AVOIDED
+from src.response_templates import render_template_response, format_tour_summary, INFANT_NOTE
 from src.prompts import response_gen_prompt, routing_prompt
 from src.tools import extract_entities_tool, search_tours_tool, fetch_locations_tool
-from src.database import get_available_locations, get_tour_by_id
+from src.database import PoolTimeout, get_available_locations, get_tour_by_id
 
-def fetch_context(state: GraphState) -> GraphState:
+SPECULATION_WORKERS = 16
+_speculation_executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculate")
+# One slot per worker, so speculative work never queues behind other turns.
+_speculation_slots = threading.BoundedSemaphore(SPECULATION_WORKERS)
+
+def fetch_context(state: GraphState) -> dict:
     current_date_str = date.today().strftime('%Y-%m-%d')
     locations = fetch_locations_tool()
     if not locations:
@@ -22,19 +33,18 @@ def fetch_context(state: GraphState) -> GraphState:
             user_query = last_message.content
 
     return {
-        **state,
         "current_date": current_date_str,
         "available_locations": locations,
         "user_query": user_query
     }
 
-def route_query(state: GraphState) -> GraphState:
+def route_query(state: GraphState) -> dict:
     user_query = state.get("user_query", "")
     messages = state.get("messages", [])
     chat_history = "\n".join([f"{m.type}: {m.content}" for m in messages[:-1]])
 
     if not user_query:
-        return {**state, "routing_decision": "error_state"}
+        return {"routing_decision": "error_state"}
 
     prompt = routing_prompt.format(chat_history=chat_history, user_query=user_query)
 
@@ -46,40 +56,83 @@ def route_query(state: GraphState) -> GraphState:
         if route not in valid_routes:
             route = "respond"
 
-        return {**state, "routing_decision": route}
+        return {"routing_decision": route}
     except Exception as e:
-        return {**state, "routing_decision": "respond", "error": str(e)}
+        return {"routing_decision": "respond", "error": str(e)}
 
 def get_routing_decision(state: GraphState) -> str:
     decision = state.get("routing_decision", "respond")
     return decision
 
-def extract_entities(state: GraphState) -> GraphState:
+def extract_entities(state: GraphState) -> dict:
     user_query = state["user_query"]
     current_date_str = state["current_date"]
 
     entities = extract_entities_tool(user_query, current_date_str)
 
     if entities and isinstance(entities, dict) and "error" in entities:
-        return {**state, "error": entities["error"], "extracted_entities": None}
+        return {"error": entities["error"], "extracted_entities": None}
 
-    return {**state, "extracted_entities": entities, "error": None}
+    return {"extracted_entities": entities, "error": None}
 
-def search_tours(state: GraphState) -> GraphState:
+def search_tours(state: GraphState) -> dict:
     entities = state.get("extracted_entities")
     if not entities or "error" in entities:
-        return {**state, "search_results": []}
+        return {"search_results": []}
 
     try:
         search_results = search_tours_tool(entities)
 
         if search_results is None:
             search_results = []
-        return {**state, "search_results": search_results}
+        return {"search_results": search_results}
+    except PoolTimeout:
+        raise
     except Exception as e:
-        return {**state, "search_results": [], "error": str(e)}
-
-def generate_response(state: GraphState) -> GraphState:
+        return {"search_results": [], "error": str(e)}
+
+def speculate_search(state: GraphState, cancelled: Optional[threading.Event] = None) -> dict:
+    update = extract_entities(state)
+    if update.get("error"):
+        update["search_results"] = []
+        return update
+    if cancelled is not None and cancelled.is_set():
+        return update
+
+    update.update(search_tours({**state, **update}))
+    return update
+
+def route_and_prefetch(state: GraphState) -> dict:
+    # NER and the tour search run on a worker thread while routing runs here.
+    # On respond/error turns the NER call already in flight still completes,
+    # but the search is skipped. With every worker busy, the turn is routed
+    # first and only search turns run NER and search.
+    if not _speculation_slots.acquire(blocking=False):
+        update = traced_node("route_query", route_query)(state)
+        if update["routing_decision"] == "search":
+            update.update(traced_node("speculate_search", speculate_search)(state))
+        return update
+
+    cancelled = threading.Event()
+    try:
+        prefetch = _speculation_executor.submit(
+            contextvars.copy_context().run,
+            traced_node("speculate_search", lambda s: speculate_search(s, cancelled)), state
+        )
+    except BaseException:
+        _speculation_slots.release()
+        raise
+    prefetch.add_done_callback(lambda _: _speculation_slots.release())
+    update = traced_node("route_query", route_query)(state)
+    if update["routing_decision"] != "search":
+        cancelled.set()
+        prefetch.cancel()
+        return update
+
+    update.update(prefetch.result())
+    return update
+
+def generate_response(state: GraphState) -> dict:
     user_query = state["user_query"].lower()
     messages = state.get("messages", [])
     search_results = state.get("search_results", [])
@@ -152,11 +205,12 @@ def generate_response(state: GraphState) -> GraphState:
 
         if not search_results and last_tour_id:
             try:
-                from src.database import get_tour_by_id
-                db_tour = get_tour_by_id(last_tour_id)
+                from src.tools import fetch_tour_tool
+                db_tour = fetch_tour_tool(last_tour_id)
                 if db_tour:
-                    from src.tools import format_itineraries
-                    search_results = format_itineraries([db_tour])
+                    search_results = [db_tour]
+            except PoolTimeout:
+                raise
             except Exception as e:
                 pass
 
@@ -195,36 +249,24 @@ def generate_response(state: GraphState) -> GraphState:
                 itinerary_text = "Xin lỗi, tôi không tìm thấy thông tin lịch trình cho tour bạn quan tâm. Bạn có thể cung cấp tên tour hoặc ID tour không?"
 
         final_response_content = itinerary_text
-        updated_messages = list(messages) + [AIMessage(content=final_response_content)]
-        return {**state, "messages": updated_messages, "final_response": final_response_content, "error": None}
+        return {"messages": [AIMessage(content=final_response_content)], "final_response": final_response_content, "error": None}
+
+    template = render_template_response(state["user_query"], state.get("search_results"), state.get("extracted_entities"), error)
+    if template is not None and template[0] in RESPONSE_TEMPLATES:
+        template_name, final_response_content = template
+        LLM_CALLS_AVOIDED.inc(template=template_name)
+        return {"messages": [AIMessage(content=final_response_content)], "final_response": final_response_content, "error": None, "llm_calls_avoided": 1}
 
     if error:
         search_results_str = f"An error occurred in a previous step: {error}"
     elif search_results:
         results_summary = []
         for i, tour in enumerate(search_results[:5]):
-            price_adult = f"{tour['price_adult']:,.0f} VND" if tour.get('price_adult') else "N/A"
-            price_child_120 = f"{tour['price_child_120_140']:,.0f} VND" if tour.get('price_child_120_140') else "N/A"
-            price_child_100 = f"{tour['price_child_100_120']:,.0f} VND" if tour.get('price_child_100_120') else "N/A"
-
-            promo_info = ""
-            if tour.get('promotion_id'):
-                discount_str = f"{tour['promotion_discount']}%" if tour.get('promotion_type') == 'percent' else f"{tour['promotion_discount']:,.0f} VND"
-                promo_info = f" (KM: {tour['promotion_name']} - Giảm {discount_str})"
-
-            summary = (
-                f"{i+1}. Tour: {tour.get('title', 'N/A')} (ID: {tour.get('tour_id')})\n"
-                f"   Khởi hành: {tour.get('start_date', 'N/A')}\n"
-                f"   Thời gian: {tour.get('duration', 'N/A')}\n"
-                f"   Giá người lớn: {price_adult}{promo_info}\n"
-                f"   Giá trẻ em (1m2-1m4): {price_child_120}\n"
-                f"   Giá trẻ em (1m-1m2): {price_child_100}"
-            )
-            results_summary.append(summary)
+            results_summary.append(format_tour_summary(i, tour))
         search_results_str = "\n".join(results_summary)
         if len(search_results) > 5:
             search_results_str += f"\n... và {len(search_results) - 5} kết quả khác."
-        search_results_str += "\n\nLưu ý: Giá vé này chưa bao gồm vé cho em bé dưới 100cm (thường được miễn phí vé dịch vụ tour, chỉ tính vé máy bay/tàu nếu có và chi phí phát sinh nếu sử dụng dịch vụ riêng)."
+        search_results_str += f"\n\n{INFANT_NOTE}"
     elif state.get("extracted_entities") and not search_results:
         search_results_str = "Xin lỗi, tôi không tìm thấy tour nào phù hợp với yêu cầu của bạn."
     else:
@@ -248,28 +290,28 @@ def generate_response(state: GraphState) -> GraphState:
     try:
         ai_response = llm.invoke(prompt)
         final_response_content = ai_response.content
-        updated_messages = list(messages) + [AIMessage(content=final_response_content)]
-        return {**state, "messages": updated_messages, "final_response": final_response_content, "error": None}
+        return {"messages": [AIMessage(content=final_response_content)], "final_response": final_response_content, "error": None}
     except Exception as e:
         error_message = "Xin lỗi, tôi gặp sự cố khi tạo câu trả lời."
-        updated_messages = list(messages) + [AIMessage(content=error_message)]
-        return {**state, "messages": updated_messages, "final_response": error_message, "error": str(e)}
+        return {"messages": [AIMessage(content=error_message)], "final_response": error_message, "error": str(e)}
 
-def handle_error(state: GraphState) -> GraphState:
+def handle_error(state: GraphState) -> dict:
     error = state.get("error", "Lỗi không xác định.")
     error_message = f"Xin lỗi, đã có lỗi xảy ra: {error}. Vui lòng thử lại hoặc hỏi khác đi."
-    messages = list(state.get("messages", [])) + [AIMessage(content=error_message)]
-    return {**state, "messages": messages, "final_response": error_message}
+    return {"messages": [AIMessage(content=error_message)], "final_response": error_message}
+
+def build_graph(speculative: bool = SPECULATIVE_EXECUTION):
+    if speculative:
+        return build_speculative_graph()
 
-def build_graph():
     workflow = StateGraph(GraphState)
 
-    workflow.add_node("fetch_context", fetch_context)
-    workflow.add_node("route_query", route_query)
-    workflow.add_node("extract_entities", extract_entities)
-    workflow.add_node("search_tours", search_tours)
-    workflow.add_node("generate_response", generate_response)
-    workflow.add_node("handle_error", handle_error)
+    workflow.add_node("fetch_context", traced_node("fetch_context", fetch_context))
+    workflow.add_node("route_query", traced_node("route_query", route_query))
+    workflow.add_node("extract_entities", traced_node("extract_entities", extract_entities))
+    workflow.add_node("search_tours", traced_node("search_tours", search_tours))
+    workflow.add_node("generate_response", traced_node("generate_response", generate_response))
+    workflow.add_node("handle_error", traced_node("handle_error", handle_error))
 
     workflow.set_entry_point("fetch_context")
 
@@ -294,4 +336,48 @@ def build_graph():
     app = workflow.compile()
     return app
 
-graph_app = build_graph()
\ No newline at end of file
+def build_speculative_graph():
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("fetch_context", traced_node("fetch_context", fetch_context))
+    workflow.add_node("route_and_prefetch", traced_node("route_and_prefetch", route_and_prefetch))
+    workflow.add_node("generate_response", traced_node("generate_response", generate_response))
+    workflow.add_node("handle_error", traced_node("handle_error", handle_error))
+
+    workflow.set_entry_point("fetch_context")
+
+    workflow.add_edge("fetch_context", "route_and_prefetch")
+
+    workflow.add_conditional_edges(
+        "route_and_prefetch",
+        get_routing_decision,
+        {
+            "search": "generate_response",
+            "respond": "generate_response",
+            "error_state": "handle_error",
+        }
+    )
+
+    workflow.add_edge("generate_response", END)
+    workflow.add_edge("handle_error", END)
+
+    app = workflow.compile()
+    return app
+
+_graph_app = None
+_graph_lock = threading.Lock()
+
+def get_graph_app():
+    global _graph_app
+    if _graph_app is None:
+        with _graph_lock:
+            if _graph_app is None:
+                _graph_app = build_graph()
+    return _graph_app
+
+def __getattr__(name):
+    # Keeps `from src.graph_builder import graph_app` working while compiling
+    # the graph on first use instead of at import.
+    if name == "graph_app":
+        return get_graph_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
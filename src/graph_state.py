@@ -1,9 +1,30 @@
-from typing import List, TypedDict, Optional, Sequence
+import operator
+from typing import Annotated, List, TypedDict, Optional, Sequence
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 from datetime import date
 
+class MessageList(list):
+    """A message history owned by a graph run; append_messages extends it in place."""
+
+def append_messages(left: Sequence[BaseMessage], right) -> List[BaseMessage]:
+    # add_messages re-validates and assigns ids to the whole history on every
+    # update; new id-less messages only need to be appended. The caller's list
+    # is copied once, on the first merge of a run, and extended in place after
+    # that. Anything else (ids, RemoveMessage, dict/tuple messages) keeps
+    # add_messages semantics.
+    if not isinstance(right, list):
+        right = [right]
+    for message in right:
+        if getattr(message, "id", "") is not None or getattr(message, "type", None) == "remove":
+            return MessageList(add_messages(left, right))
+    if not isinstance(left, MessageList):
+        left = MessageList(left)
+    left.extend(right)
+    return left
+
 class GraphState(TypedDict):
-    messages: Sequence[BaseMessage]
+    messages: Annotated[Sequence[BaseMessage], append_messages]
     user_query: str
     current_date: str
     available_locations: Optional[List[str]]
@@ -11,4 +32,5 @@ class GraphState(TypedDict):
     search_results: Optional[List[dict]]
     final_response: Optional[str]
     error: Optional[str]
-    routing_decision: Optional[str]
\ No newline at end of file
+    routing_decision: Optional[str]
+    llm_calls_avoided: Annotated[int, operator.add]
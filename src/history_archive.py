@@ -0,0 +1,273 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+import psycopg2
+from .config import HISTORY_ARCHIVE_DAYS, HISTORY_ARCHIVE_BATCH_SIZE, HISTORY_EXPORT_CONCURRENCY
+from .database import DATABASE_URL, get_pooled_connection
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = "chatbothistory_archive"
+COLUMNS = ("user_id", "message", "response", "interaction_time")
+
+ARCHIVE_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+    user_id INTEGER NOT NULL,
+    message TEXT,
+    response TEXT,
+    interaction_time TIMESTAMPTZ NOT NULL
+) PARTITION BY RANGE (interaction_time);
+CREATE INDEX IF NOT EXISTS {ARCHIVE_TABLE}_user_time_idx ON {ARCHIVE_TABLE} (user_id, interaction_time DESC);
+"""
+
+# CONCURRENTLY so installing on a live ChatbotHistory does not block writes;
+# it cannot run inside a transaction.
+HOT_INDEX_SQL = "CREATE INDEX CONCURRENTLY IF NOT EXISTS chatbothistory_user_time_idx ON ChatbotHistory (user_id, interaction_time DESC)"
+
+MOVE_BATCH_SQL = f"""
+WITH moved AS (
+    DELETE FROM ChatbotHistory
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM ChatbotHistory
+        WHERE interaction_time < %s
+        ORDER BY interaction_time
+        LIMIT %s
+    ))
+    RETURNING {", ".join(COLUMNS)}
+)
+INSERT INTO {ARCHIVE_TABLE} ({", ".join(COLUMNS)})
+SELECT {", ".join(COLUMNS)} FROM moved
+"""
+
+EXPORT_SQL = f"""
+SELECT {", ".join(COLUMNS)} FROM {ARCHIVE_TABLE} WHERE user_id = %(user_id)s
+UNION ALL
+SELECT {", ".join(COLUMNS)} FROM ChatbotHistory WHERE user_id = %(user_id)s
+ORDER BY interaction_time
+"""
+
+HOT_EXPORT_SQL = f"""
+SELECT {", ".join(COLUMNS)} FROM ChatbotHistory WHERE user_id = %(user_id)s
+ORDER BY interaction_time
+"""
+
+def install():
+    with get_pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(ARCHIVE_SCHEMA_SQL)
+        conn.commit()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute(HOT_INDEX_SQL)
+        finally:
+            conn.autocommit = False
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def ensure_partitions(cur, start: datetime, end: datetime):
+    """Creates the monthly archive partitions covering [start, end)."""
+    month = _month_start(start)
+    while month < end:
+        following = _next_month(month)
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE}_{month:%Y%m} PARTITION OF {ARCHIVE_TABLE} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            (month, following),
+        )
+        month = following
+
+def archive_history(older_than_days: int = HISTORY_ARCHIVE_DAYS, batch_size: int = HISTORY_ARCHIVE_BATCH_SIZE) -> int:
+    """Moves turns older than `older_than_days` into the partitioned archive.
+
+    Each batch deletes from ChatbotHistory and inserts into the archive in
+    one statement and one transaction, so rows are never lost or duplicated
+    and locks are held only for a batch at a time.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    moved = 0
+    with get_pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT min(interaction_time) FROM ChatbotHistory WHERE interaction_time < %s", (cutoff,))
+            oldest = cur.fetchone()[0]
+            if oldest is None:
+                return 0
+            ensure_partitions(cur, oldest, cutoff)
+        conn.commit()
+
+        while True:
+            start = time.perf_counter()
+            with conn.cursor() as cur:
+                cur.execute(MOVE_BATCH_SQL, (cutoff, batch_size))
+                count = cur.rowcount
+            conn.commit()
+            moved += count
+            logger.info("Archived %s history rows in %.3fs", count, time.perf_counter() - start)
+            if count < batch_size:
+                break
+    return moved
+
+def _export_sql(cur) -> str:
+    # Until `python -m src.history_archive install` has run there is no
+    # archive table, and a query naming it would fail mid-download.
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (ARCHIVE_TABLE,))
+    if cur.fetchone()[0]:
+        return EXPORT_SQL
+    logger.info("%s does not exist; exporting ChatbotHistory only", ARCHIVE_TABLE)
+    return HOT_EXPORT_SQL
+
+_export_slots = threading.BoundedSemaphore(HISTORY_EXPORT_CONCURRENCY)
+
+class ExportsBusy(Exception):
+    pass
+
+class HistoryExport:
+    """A user's hot and archived turns, oldest first, as NDJSON lines.
+
+    Only the hot table is read while the archive has not been installed.
+
+    Creating one reserves one of HISTORY_EXPORT_CONCURRENCY slots (raising
+    ExportsBusy if `blocking` is false and none is free); it is released
+    when iteration ends or the export is closed. Rows come from a
+    server-side cursor `itersize` at a time on a dedicated connection, so
+    a slow download neither grows memory nor holds a pooled connection.
+    """
+
+    def __init__(self, user_id: int, itersize: int = 2000, blocking: bool = True):
+        self.user_id = user_id
+        self.itersize = itersize
+        self._released = True
+        if not _export_slots.acquire(blocking):
+            raise ExportsBusy(f"{HISTORY_EXPORT_CONCURRENCY} history exports already running")
+        self._released = False
+
+    def __iter__(self) -> Iterator[str]:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.set_session(readonly=True)
+            with conn.cursor() as cur:
+                query = _export_sql(cur)
+            with conn.cursor(name=f"export_history_{self.user_id}") as cur:
+                cur.itersize = self.itersize
+                cur.execute(query, {"user_id": self.user_id})
+                for user_id_, message, response, interaction_time in cur:
+                    yield json.dumps({
+                        "user_id": user_id_,
+                        "message": message,
+                        "response": response,
+                        "interaction_time": interaction_time.isoformat(),
+                    }, ensure_ascii=False) + "\n"
+        finally:
+            if conn is not None:
+                conn.close()
+            self.close()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            _export_slots.release()
+
+    def __del__(self):
+        self.close()
+
+def export_history(user_id: int, itersize: int = 2000, blocking: bool = True) -> HistoryExport:
+    return HistoryExport(user_id, itersize, blocking)
+
+def _copy_text(value) -> str:
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+class _CopyBuffer:
+    """File-like source for COPY FROM that encodes records lazily."""
+
+    def __init__(self, records: Iterable[dict]):
+        self._records = iter(records)
+        self._pending = ""
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            self._pending += "\t".join(_copy_text(record.get(column)) for column in COLUMNS) + "\n"
+            self.count += 1
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    readline = read
+
+def import_history(lines: Iterable[str], batch_size: int = HISTORY_ARCHIVE_BATCH_SIZE) -> int:
+    """Loads NDJSON turns (the export_history format) into ChatbotHistory with COPY.
+
+    Old turns can then be moved out by archive_history as usual.
+    """
+    records = (json.loads(line) for line in lines if line.strip())
+    imported = 0
+    with get_pooled_connection() as conn:
+        while True:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    break
+            if not batch:
+                break
+            source = _CopyBuffer(batch)
+            with conn.cursor() as cur:
+                cur.copy_expert(f"COPY ChatbotHistory ({', '.join(COLUMNS)}) FROM STDIN", source)
+            conn.commit()
+            imported += source.count
+    return imported
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="ChatbotHistory archival, export and import.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("install", help="create the archive table and history indexes")
+    archive = commands.add_parser("archive", help="move old turns into the archive")
+    archive.add_argument("--older-than-days", type=int, default=HISTORY_ARCHIVE_DAYS)
+    archive.add_argument("--batch-size", type=int, default=HISTORY_ARCHIVE_BATCH_SIZE)
+    export = commands.add_parser("export", help="write a user's history as NDJSON")
+    export.add_argument("user_id", type=int)
+    export.add_argument("-o", "--output", help="file to write (default: stdout)")
+    load = commands.add_parser("import", help="load NDJSON turns into ChatbotHistory")
+    load.add_argument("input", help="NDJSON file, or - for stdin")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "install":
+        install()
+    elif args.command == "archive":
+        print(f"Archived {archive_history(args.older_than_days, args.batch_size)} turns.", file=sys.stderr)
+    elif args.command == "export":
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            out.writelines(export_history(args.user_id))
+        finally:
+            if args.output:
+                out.close()
+    elif args.command == "import":
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        try:
+            print(f"Imported {import_history(source)} turns.", file=sys.stderr)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+if __name__ == "__main__":
+    main()
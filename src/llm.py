@@ -1,19 +1,314 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from .config import GOOGLE_API_KEY
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .config import (
+    GOOGLE_API_KEY, LLM_BACKEND, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_HEDGE_AFTER,
+    LLM_MAX_CONCURRENCY, LLM_RATE_LIMIT, LLM_RATE_BURST
+)
+from .metrics import registry, span, current_node, Counter, LLM_LATENCY, LLM_TOKENS
 import warnings
 
 warnings.filterwarnings("ignore", category=UserWarning, module="langchain_google_genai")
 
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TooManyRequests", "GatewayTimeout", "BadGateway", "Aborted", "RetryError",
+}
+
+class LLMTimeoutError(TimeoutError):
+    pass
+
+def is_retryable_error(error: Exception) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            code = None
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_for = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+class LLMMetrics:
+    def __init__(self, window: int = 1000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record_call(self, latency: float, usage: dict = None):
+        with self.lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            if usage:
+                self.input_tokens += usage.get("input_tokens", 0) or 0
+                self.output_tokens += usage.get("output_tokens", 0) or 0
+
+    def increment(self, name: str):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def percentile(self, p: float):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            snapshot = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+        snapshot["latency_p50"] = self.percentile(50)
+        snapshot["latency_p95"] = self.percentile(95)
+        return snapshot
+
+class LLMClient:
+    """Wraps a chat model with deadlines, retries, hedging and rate limiting.
+
+    ``model`` is anything with an ``invoke(prompt, timeout=...)`` method, so a
+    fake model can stand in for Gemini; each call is given the time left
+    before the deadline, so an abandoned call frees its slot by then; alternatively ``model_factory`` builds it on the
+    first call. ``hedge_after`` is a delay in seconds, ``"p95"``
+    to hedge after the observed p95 latency, or None to disable hedging.
+    """
+
+    def __init__(self, model=None, timeout: float = 30.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_after=None, max_concurrency: int = 8,
+                 rate_limit: float = None, rate_burst: float = None,
+                 min_hedge_samples: int = 20, model_factory=None):
+        self._model = model
+        self._model_lock = threading.Lock()
+        self.model_factory = model_factory
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.min_hedge_samples = min_hedge_samples
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst) if rate_limit else None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self.metrics = LLMMetrics()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self.model_factory()
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    def invoke(self, prompt, timeout: float = None):
+        with span("llm"):
+            return self._invoke_with_retries(prompt, timeout)
+
+    def _invoke_with_retries(self, prompt, timeout: float = None):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        node = current_node() or "unknown"
+        attempt = 0
+        while True:
+            try:
+                return self._invoke_once(prompt, deadline, node)
+            except Exception as e:
+                self.metrics.increment("errors")
+                if isinstance(e, LLMTimeoutError):
+                    self.metrics.increment("timeouts")
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning("LLM call failed (%s), retrying in %.2fs", type(e).__name__, delay)
+                time.sleep(delay)
+                attempt += 1
+                self.metrics.increment("retries")
+
+    def _hedge_delay(self):
+        if self.hedge_after == "p95":
+            if len(self.metrics.latencies) < self.min_hedge_samples:
+                return None
+            return self.metrics.percentile(95)
+        return self.hedge_after
+
+    def _acquire(self, deadline: float, blocking: bool = True) -> bool:
+        remaining = max(0.0, deadline - time.monotonic())
+        if not self.semaphore.acquire(blocking, remaining if blocking else None):
+            return False
+        if self.rate_limiter and not self.rate_limiter.acquire(remaining if blocking else 0):
+            self.semaphore.release()
+            return False
+        return True
+
+    def _submit(self, prompt, node: str, deadline: float):
+        future = self.executor.submit(self._call, prompt, node, deadline)
+        future.add_done_callback(lambda _: self.semaphore.release())
+        return future
+
+    def _call(self, prompt, node: str, deadline: float):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        start = time.perf_counter()
+        try:
+            result = self.model.invoke(prompt, timeout=remaining)
+        except Exception as e:
+            if isinstance(e, TimeoutError) or type(e).__name__ == "DeadlineExceeded":
+                raise LLMTimeoutError("LLM call exceeded its deadline") from e
+            raise
+        latency = time.perf_counter() - start
+        usage = getattr(result, "usage_metadata", None)
+        self.metrics.record_call(latency, usage)
+        LLM_LATENCY.observe(latency, node=node)
+        if usage:
+            LLM_TOKENS.inc(usage.get("input_tokens", 0) or 0, node=node, direction="input")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0) or 0, node=node, direction="output")
+        return result
+
+    def _invoke_once(self, prompt, deadline: float, node: str):
+        if not self._acquire(deadline):
+            raise LLMTimeoutError("Timed out waiting for an LLM slot")
+        primary = self._submit(prompt, node, deadline)
+        pending = {primary}
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and time.monotonic() + hedge_delay < deadline:
+            done, pending = wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+            if self._acquire(deadline, blocking=False):
+                self.metrics.increment("hedges")
+                pending.add(self._submit(prompt, node, deadline))
+
+        first_error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self.metrics.increment("hedge_wins")
+                    return future.result()
+                first_error = first_error or future.exception()
+        if first_error is not None and not pending:
+            raise first_error
+        raise LLMTimeoutError("LLM call exceeded its deadline")
+
 def get_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
     try:
         llm = ChatGoogleGenerativeAI(
             model="gemini-2.0-flash",
             google_api_key=GOOGLE_API_KEY,
             temperature=0.1,
-            convert_system_message_to_human=True
+            convert_system_message_to_human=True,
+            timeout=LLM_TIMEOUT,
+            # LLMClient does the retrying; one attempt per call here.
+            max_retries=1,
         )
         return llm
     except Exception as e:
         raise
 
-llm = get_llm()
\ No newline at end of file
+def get_fake_llm():
+    from .fake_llm import fake_chat_model_from_env
+    return fake_chat_model_from_env(os.environ)
+
+LLM_BACKENDS = {
+    "gemini": get_llm,
+    "fake": get_fake_llm,
+}
+
+def register_llm_backend(name: str, factory):
+    LLM_BACKENDS[name] = factory
+
+def create_chat_model(backend: str = None):
+    backend = backend or LLM_BACKEND
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}'. Available: {', '.join(sorted(LLM_BACKENDS))}")
+    return LLM_BACKENDS[backend]()
+
+def get_llm_client(model=None):
+    return LLMClient(
+        model,
+        model_factory=create_chat_model,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        hedge_after=LLM_HEDGE_AFTER,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        rate_limit=LLM_RATE_LIMIT,
+        rate_burst=LLM_RATE_BURST,
+    )
+
+llm = get_llm_client()
+
+def _collect_llm_metrics():
+    counter = Counter("chatbot_llm_events_total", "LLM client retries, timeouts, hedges and errors.", ("event",))
+    snapshot = llm.metrics.snapshot()
+    for event in ("calls", "errors", "retries", "timeouts", "hedges", "hedge_wins"):
+        counter.inc(snapshot[event], event=event)
+    return [counter]
+
+registry.register_collector(_collect_llm_metrics)
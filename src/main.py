@@ -2,13 +2,13 @@ from datetime import date
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage, SystemMessage
 from typing import List, Sequence
 
-from src.graph_builder import graph_app
+from src.graph_builder import get_graph_app
 from src.graph_state import GraphState
-from src.database import conn_pool
+from src.database import get_conn_pool
 
 def run_chatbot():
     try:
-        if conn_pool is None:
+        if get_conn_pool() is None:
             print("\nLỗi: Không thể kết nối Database. Chatbot không thể hoạt động.")
             return
 
@@ -46,7 +46,7 @@ def run_chatbot():
                 "routing_decision": None,
             }
 
-            final_state = graph_app.invoke(graph_input)
+            final_state = get_graph_app().invoke(graph_input)
 
             conversation_history = list(final_state.get("messages", conversation_history))
             response = final_state.get("final_response", "Xin lỗi, tôi không thể xử lý yêu cầu này.")
@@ -0,0 +1,208 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items
+        ]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, list(counts), total, count) for key, (counts, total, count) in self.values.items())
+        lines = self.header()
+        for key, counts, total, count in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', bound))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels=()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, collector):
+        # collector() is called at scrape time and returns metrics to render.
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self.metrics.values())
+        for collector in self.collectors:
+            try:
+                metrics.extend(collector())
+            except Exception:
+                pass
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram("chatbot_request_duration_seconds", "HTTP request latency.", ("endpoint", "status"))
+NODE_LATENCY = registry.histogram("chatbot_node_duration_seconds", "Graph node latency.", ("node",))
+STEP_LATENCY = registry.histogram("chatbot_step_duration_seconds", "Latency of steps inside graph nodes.", ("step",))
+NODE_ERRORS = registry.counter("chatbot_node_errors_total", "Graph node runs that reported an error.", ("node",))
+DB_QUERY_LATENCY = registry.histogram("chatbot_db_query_duration_seconds", "Database query latency.", ("query",))
+DB_QUERY_ROWS = registry.counter("chatbot_db_query_rows_total", "Rows returned by database queries.", ("query",))
+DB_POOL_WAIT = registry.histogram("chatbot_db_pool_wait_seconds", "Time spent waiting for a pooled connection.")
+DB_POOL_TIMEOUTS = registry.counter("chatbot_db_pool_timeouts_total", "Pooled connection checkouts that timed out.")
+DB_QUERY_ERRORS = registry.counter("chatbot_db_query_errors_total", "Failed database queries.", ("query",))
+LLM_LATENCY = registry.histogram("chatbot_llm_call_duration_seconds", "Latency of individual LLM calls.", ("node",))
+LLM_TOKENS = registry.counter("chatbot_llm_tokens_total", "LLM tokens used.", ("node", "direction"))
+CACHE_REQUESTS = registry.counter("chatbot_cache_requests_total", "Cache lookups.", ("cache", "result"))
+LLM_CALLS_AVOIDED = registry.counter("chatbot_llm_calls_avoided_total", "Responses rendered from a template instead of the LLM.", ("template",))
+ADMISSION_REQUESTS = registry.counter("chatbot_admission_requests_total", "Chat admission decisions.", ("result",))
+ADMISSION_LIMIT = registry.gauge("chatbot_admission_limit", "Current adaptive in-flight limit for chat requests.")
+ADMISSION_IN_FLIGHT = registry.gauge("chatbot_admission_in_flight", "Chat requests currently admitted.")
+ADMISSION_QUEUED = registry.gauge("chatbot_admission_queued", "Chat requests waiting for admission.")
+AUTH_REQUESTS = registry.counter("chatbot_auth_total", "Bearer token verifications by result.", ("result",))
+
+class RequestTrace:
+    def __init__(self):
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add(self, name: str, duration: float):
+        with self.lock:
+            self.spans.append((name, duration))
+
+    def server_timing(self) -> str:
+        with self.lock:
+            spans = list(self.spans)
+        return ", ".join(f"{name.replace('.', '_')};dur={duration * 1000:.1f}" for name, duration in spans)
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+_current_node = contextvars.ContextVar("graph_node", default=None)
+
+@contextmanager
+def request_trace():
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def current_node():
+    return _current_node.get()
+
+@contextmanager
+def span(name: str, histogram: Histogram = None, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(duration, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, duration)
+
+def traced_node(name: str, node):
+    def wrapper(state):
+        token = _current_node.set(name)
+        try:
+            with span(name, NODE_LATENCY, node=name):
+                update = node(state)
+        finally:
+            _current_node.reset(token)
+        if isinstance(update, dict) and update.get("error"):
+            NODE_ERRORS.inc(node=name)
+            logger.warning("Graph node %s reported an error: %s", name, update["error"])
+        return update
+    wrapper.__name__ = getattr(node, "__name__", name)
+    wrapper.__annotations__ = getattr(node, "__annotations__", {})
+    return wrapper
@@ -0,0 +1,139 @@
+import logging
+import sys
+import threading
+from .config import CACHE_INVALIDATION_LISTENER
+
+logger = logging.getLogger(__name__)
+
+VIEW_NAME = "departure_best_promotion"
+
+# Best active promotion for one departure: the largest adult-price discount,
+# with percent and fixed-amount promotions compared in VND.
+BEST_PROMOTION_SQL = """
+    SELECT
+        p.promotion_id,
+        p.name AS promotion_name,
+        p.type AS promotion_type,
+        p.discount AS promotion_discount,
+        p.start_date AS promotion_start_date,
+        p.end_date AS promotion_end_date,
+        LEAST(d.price_adult, CASE WHEN p.type = 'percent'
+            THEN d.price_adult * p.discount / 100 ELSE p.discount END) AS discount_amount
+    FROM Tour_Promotion tp
+    JOIN Promotion p ON p.promotion_id = tp.promotion_id
+    WHERE tp.tour_id = d.tour_id
+        AND p.status = 'active'
+        AND {on_date} BETWEEN p.start_date AND p.end_date
+    ORDER BY discount_amount DESC NULLS LAST, p.promotion_id
+    LIMIT 1
+"""
+
+CREATE_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {VIEW_NAME} AS
+SELECT d.departure_id, bp.*, d.price_adult - bp.discount_amount AS effective_price_adult
+FROM Departure d
+JOIN LATERAL ({BEST_PROMOTION_SQL.format(on_date="d.start_date")}) bp ON true;
+CREATE UNIQUE INDEX IF NOT EXISTS {VIEW_NAME}_departure_idx ON {VIEW_NAME} (departure_id);
+"""
+
+EFFECTIVE_PRICE_SQL = "COALESCE(d.price_adult - bp.discount_amount, d.price_adult)"
+
+PROMOTION_COLUMNS = f"""
+        bp.promotion_id,
+        bp.promotion_name,
+        bp.promotion_type,
+        bp.promotion_discount,
+        bp.promotion_start_date,
+        bp.promotion_end_date,
+        bp.discount_amount,
+        {EFFECTIVE_PRICE_SQL} AS effective_price_adult"""
+
+# Refreshes from several app workers are serialized rather than run concurrently.
+_REFRESH_LOCK_KEY = 0x70726f6d6f
+# Session lock taken by the one cache listener per database that refreshes the view.
+REFRESH_LEADER_LOCK_KEY = 0x70726f6d6f6c
+
+_view_available = None
+_lock = threading.Lock()
+
+def view_available() -> bool:
+    """True when the view exists and is kept fresh.
+
+    The view is only refreshed by the cache listener, on notifications from
+    the catalog triggers; without either, reading it would serve stale
+    promotions, so the live lookup is used instead.
+    """
+    global _view_available
+    if _view_available is None:
+        with _lock:
+            if _view_available is None:
+                from .database import execute_query
+                from .cache_listener import TRIGGER_NAMES
+                row = execute_query(
+                    "SELECT to_regclass(%s) IS NOT NULL AS present, "
+                    "(SELECT count(DISTINCT tgname) FROM pg_trigger WHERE tgname = ANY(%s)) AS triggers",
+                    (VIEW_NAME, list(TRIGGER_NAMES)),
+                    fetch_one=True, name="promotion_view_check",
+                )
+                if row is None:
+                    return False
+                available = row["present"]
+                if available and row["triggers"] < len(TRIGGER_NAMES):
+                    logger.error("%s exists but the catalog change triggers are missing; using live promotion "
+                                 "lookups. Run: python -m src.promotions install", VIEW_NAME)
+                    available = False
+                elif available and not CACHE_INVALIDATION_LISTENER:
+                    logger.error("%s exists but CACHE_INVALIDATION_LISTENER is off, so nothing refreshes it; "
+                                 "using live promotion lookups.", VIEW_NAME)
+                    available = False
+                _view_available = available
+    return _view_available
+
+def best_promotion_join(on_date: str = "d.start_date") -> str:
+    """LEFT JOIN giving each departure row `d` at most one promotion, as `bp`.
+
+    Promotions applicable on the departure date come from the materialized
+    view when it is installed; anything else (e.g. CURRENT_DATE) is resolved
+    inline with a LATERAL subquery.
+    """
+    if on_date == "d.start_date" and view_available():
+        return f"LEFT JOIN {VIEW_NAME} bp ON bp.departure_id = d.departure_id"
+    return f"LEFT JOIN LATERAL ({BEST_PROMOTION_SQL.format(on_date=on_date)}) bp ON true"
+
+def install_view():
+    """Creates the view and the catalog triggers whose notifications refresh it."""
+    global _view_available
+    from .database import get_pooled_connection
+    from .cache_listener import install_triggers
+    with get_pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_VIEW_SQL)
+    install_triggers()
+    _view_available = None
+
+def refresh_best_promotions():
+    global _view_available
+    if not view_available():
+        return False
+    from .database import get_pooled_connection
+    try:
+        with get_pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (_REFRESH_LOCK_KEY,))
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VIEW_NAME}")
+    except Exception as e:
+        logger.warning("Could not refresh %s: %s", VIEW_NAME, e)
+        _view_available = None
+        return False
+    return True
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["install"]:
+        install_view()
+        print(f"Created materialized view {VIEW_NAME} and the catalog change triggers that refresh it.")
+    elif sys.argv[1:] == ["refresh"]:
+        refresh_best_promotions()
+        print(f"Refreshed materialized view {VIEW_NAME}.")
+    else:
+        print("Usage: python -m src.promotions install|refresh")
+        sys.exit(2)
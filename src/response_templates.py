@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+NO_RESULTS_RESPONSE = "Xin lỗi, tôi không tìm thấy tour nào phù hợp với yêu cầu của bạn. Bạn có muốn thử tìm kiếm với tiêu chí khác không?"
+
+INFANT_NOTE = "Lưu ý: Giá vé này chưa bao gồm vé cho em bé dưới 100cm (thường được miễn phí vé dịch vụ tour, chỉ tính vé máy bay/tàu nếu có và chi phí phát sinh nếu sử dụng dịch vụ riêng)."
+
+PRICE_KEYWORDS = ["giá", "bao nhiêu tiền", "chi phí", "bảng giá", "price"]
+
+MAX_LISTED = 5
+
+def _vnd(value) -> str:
+    return f"{value:,.0f} VND" if value else "N/A"
+
+def format_price(tour: dict) -> str:
+    price = _vnd(tour.get('price_adult'))
+    if tour.get('promotion_id'):
+        discount_str = f"{tour['promotion_discount']}%" if tour.get('promotion_type') == 'percent' else f"{tour['promotion_discount']:,.0f} VND"
+        price += f" (KM: {tour['promotion_name']} - Giảm {discount_str}"
+        if tour.get('effective_price_adult') is not None:
+            price += f", còn {tour['effective_price_adult']:,.0f} VND"
+        price += ")"
+    return price
+
+def format_tour_summary(i: int, tour: dict) -> str:
+    return (
+        f"{i+1}. Tour: {tour.get('title', 'N/A')} (ID: {tour.get('tour_id')})\n"
+        f"   Khởi hành: {tour.get('start_date', 'N/A')}\n"
+        f"   Thời gian: {tour.get('duration', 'N/A')}\n"
+        f"   Giá người lớn: {format_price(tour)}\n"
+        f"   Giá trẻ em (1m2-1m4): {_vnd(tour.get('price_child_120_140'))}\n"
+        f"   Giá trẻ em (1m-1m2): {_vnd(tour.get('price_child_100_120'))}"
+    )
+
+def _more(results: List[dict]) -> str:
+    return f"\n... và {len(results) - MAX_LISTED} kết quả khác." if len(results) > MAX_LISTED else ""
+
+def render_single_tour(results: List[dict]) -> str:
+    tour = results[0]
+    lines = [
+        "Đây là thông tin phù hợp với yêu cầu của bạn:",
+        f"Tour: {tour.get('title', 'N/A')} (ID: {tour.get('tour_id')})",
+        f"- Thời gian: {tour.get('duration', 'N/A')}",
+        f"- Khởi hành từ: {tour.get('departure_location', 'N/A')}",
+        "- Các ngày khởi hành:",
+    ]
+    for departure in results[:MAX_LISTED]:
+        lines.append(
+            f"  + {departure.get('start_date', 'N/A')}: người lớn {format_price(departure)}, "
+            f"trẻ em 1m2-1m4 {_vnd(departure.get('price_child_120_140'))}, "
+            f"trẻ em 1m-1m2 {_vnd(departure.get('price_child_100_120'))}"
+        )
+    return "\n".join(lines) + _more(results) + f"\n\n{INFANT_NOTE}\n\nBạn có muốn xem lịch trình chi tiết của tour này không?"
+
+def render_price_list(results: List[dict]) -> str:
+    lines = ["Dưới đây là giá các tour phù hợp với yêu cầu của bạn:"]
+    for i, tour in enumerate(results[:MAX_LISTED]):
+        lines.append(
+            f"{i+1}. Tour: {tour.get('title', 'N/A')} (ID: {tour.get('tour_id')}) - "
+            f"khởi hành {tour.get('start_date', 'N/A')}: người lớn {format_price(tour)}"
+        )
+    return "\n".join(lines) + _more(results) + f"\n\n{INFANT_NOTE}"
+
+def render_template_response(user_query: str, search_results: Optional[List[dict]], extracted_entities: Optional[dict], error: Optional[str]) -> Optional[tuple]:
+    """Answers fixed-shape search outcomes without the LLM.
+
+    Returns (template name, response) for an empty search, results that all
+    belong to one tour, or an explicit price question; None when the turn
+    needs an open-ended reply.
+    """
+    if error or not extracted_entities or "error" in extracted_entities or search_results is None:
+        return None
+    if not search_results:
+        return "no_results", NO_RESULTS_RESPONSE
+    if len({tour.get('tour_id') for tour in search_results}) == 1:
+        return "single_tour", render_single_tour(search_results)
+    if any(kw in user_query.lower() for kw in PRICE_KEYWORDS):
+        return "price_list", render_price_list(search_results)
+    return None
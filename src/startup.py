@@ -0,0 +1,75 @@
+import logging
+import sys
+import time
+from .config import WARMUP_COMPONENTS
+
+logger = logging.getLogger(__name__)
+
+_warmup_status = {}
+
+def _warm_database():
+    from .database import get_conn_pool
+    if get_conn_pool() is None:
+        raise ConnectionError("Database connection pool could not be opened.")
+    from .tools import fetch_locations_tool
+    fetch_locations_tool()
+
+def _warm_llm():
+    from .llm import llm
+    llm.model
+
+def _warm_graph():
+    from .graph_builder import get_graph_app
+    get_graph_app()
+
+def _warm_embedding():
+    from .embedding_pool import embedding_pool
+    if embedding_pool is not None:
+        embedding_pool.wait_ready()
+        return
+    from .embedding import embedding_model
+    embedding_model.load_model()
+
+WARMERS = {
+    "database": _warm_database,
+    "llm": _warm_llm,
+    "graph": _warm_graph,
+    "embedding": _warm_embedding,
+}
+
+def warm_up(components=None):
+    for name in components or WARMUP_COMPONENTS:
+        start = time.perf_counter()
+        try:
+            WARMERS[name]()
+            _warmup_status[name] = {"seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            _warmup_status[name] = {"seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+            logger.warning("Warm-up of %s failed: %s", name, e)
+    return dict(_warmup_status)
+
+def _is_loaded(name: str) -> bool:
+    # Checks live state without triggering initialization, so components
+    # loaded lazily by traffic count as ready too. Modules may still be
+    # mid-import while warm-up runs, hence getattr with defaults.
+    if name == "database":
+        return getattr(sys.modules.get("src.database"), "conn_pool", None) is not None
+    if name == "llm":
+        client = getattr(sys.modules.get("src.llm"), "llm", None)
+        return client is not None and client.model_loaded
+    if name == "graph":
+        return getattr(sys.modules.get("src.graph_builder"), "_graph_app", None) is not None
+    if name == "embedding":
+        pool_module = sys.modules.get("src.embedding_pool")
+        pool = getattr(pool_module, "embedding_pool", None)
+        if pool is not None:
+            return pool.ready
+        model = getattr(sys.modules.get("src.embedding"), "embedding_model", None)
+        return model is not None and model.model is not None
+    return False
+
+def readiness(components=None):
+    status = {}
+    for name in components or WARMUP_COMPONENTS:
+        status[name] = {"ready": _is_loaded(name), **_warmup_status.get(name, {})}
+    return all(component["ready"] for component in status.values()), status
@@ -1,24 +1,35 @@
 import json
-from datetime import date
 from .llm import llm
 from .prompts import ner_prompt
-from .database import search_tours_db, get_available_locations
-import dateparser
-from bs4 import BeautifulSoup
+from .database import PoolTimeout, Record, build_search_query, execute_query, get_available_locations, get_tour_by_id
+from .metrics import STEP_LATENCY, span
+from .cache import Cache
+from .config import LOCATIONS_CACHE_TTL, ENTITY_CACHE_TTL, TOUR_CACHE_TTL, SEARCH_CACHE_TTL
 
-_cached_locations = None
-_locations_fetched_date = None
+locations_cache = Cache("locations", ttl=LOCATIONS_CACHE_TTL)
+entities_cache = Cache("entities", ttl=ENTITY_CACHE_TTL)
+tours_cache = Cache("tours", ttl=TOUR_CACHE_TTL)
+search_cache = Cache("search", ttl=SEARCH_CACHE_TTL)
 
 def fetch_locations_tool():
-    global _cached_locations, _locations_fetched_date
-    today = date.today()
-    if _cached_locations is None or _locations_fetched_date != today:
-        _cached_locations = get_available_locations()
-        _locations_fetched_date = today
-    return _cached_locations if _cached_locations else []
+    # Long-lived: src.cache_listener invalidates it when tours change.
+    locations = locations_cache.get_or_load("available", get_available_locations)
+    return locations if locations else []
+
+def fetch_tour_tool(tour_id):
+    def load():
+        tour = get_tour_by_id(tour_id)
+        return format_itineraries([tour])[0] if tour else None
+    return tours_cache.get_or_load(str(tour_id), load)
+
+def invalidate_tour_caches():
+    # Bumps the shared generation counters, so every worker drops its view.
+    for cache in (locations_cache, entities_cache, tours_cache, search_cache):
+        cache.invalidate()
 
 def format_itineraries(tours_array):
-    for tour in tours_array:
+    from bs4 import BeautifulSoup
+    for i, tour in enumerate(tours_array):
         if isinstance(tour.get('itinerary'), list):
             itinerary_str = ""
             days = sorted(tour['itinerary'], key=lambda x: x.get('day_number', 0))
@@ -34,10 +45,22 @@ def format_itineraries(tours_array):
                 except:
                     description_text = description_html
                 itinerary_str += f"Ngày {day_number}: {title}\n{description_text}\n\n"
-            tour['itinerary'] = itinerary_str.strip()
+            if isinstance(tour, Record):
+                tours_array[i] = tour.replace(itinerary=itinerary_str.strip())
+            else:
+                tour['itinerary'] = itinerary_str.strip()
     return tours_array
 
 def extract_entities_tool(user_query: str, current_date_str: str) -> dict:
+    # Relative dates in the query resolve against current_date_str, so it is
+    # part of the key; failed extractions are not cached.
+    key = json.dumps([current_date_str, user_query.strip()], ensure_ascii=False)
+    return entities_cache.get_or_load(
+        key, lambda: _extract_entities(user_query, current_date_str),
+        cacheable=lambda entities: isinstance(entities, dict) and "error" not in entities,
+    )
+
+def _extract_entities(user_query: str, current_date_str: str) -> dict:
     locations = fetch_locations_tool()
     if not locations:
         pass
@@ -88,12 +111,26 @@ def search_tours_tool(entities: dict) -> list:
         return []
 
     try:
-        search_results = search_tours_db(entities)
+        # Identical concurrent searches share one query; the formatted result
+        # is cached briefly (a failed query, None, is not).
+        formatted_results = search_cache.get_or_load(_search_key(entities), lambda: _search_tours(entities))
+        return formatted_results if formatted_results is not None else []
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        return []
 
-        if search_results is None:
-            return []
+def _search_key(entities: dict) -> str:
+    canonical = dict(entities)
+    if isinstance(canonical.get("destination"), list):
+        canonical["destination"] = sorted(canonical["destination"], key=str)
+    return json.dumps(canonical, sort_keys=True, ensure_ascii=False, default=str)
 
-        formatted_results = format_itineraries(search_results)
-        return formatted_results
-    except Exception as e:
-        return []
\ No newline at end of file
+def _search_tours(entities: dict):
+    query, params = build_search_query(entities)
+    search_results = execute_query(query, params, name="search_tours")
+    if search_results is None:
+        return None
+
+    with span("format_itineraries", STEP_LATENCY, step="format_itineraries"):
+        return format_itineraries(search_results)
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+
+# src.config refuses to import without database settings or a Gemini key;
+# the unit tests touch neither, so give them harmless defaults.
+os.environ.setdefault("DB_NAME", "travel_test")
+os.environ.setdefault("DB_USER", "postgres")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("EMBEDDING_WORKERS", "0")
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionController, Overloaded
+
+def _controller(**kwargs):
+    options = dict(initial_limit=2, min_limit=1, max_limit=8, latency_target=1.0, max_queue=4, queue_timeout=1.0)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+def test_admits_up_to_the_limit_then_queues():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire()
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        assert controller.snapshot()["queued"] == 1
+
+        controller.release()
+        await asyncio.wait_for(waiter, 1)
+        assert controller.in_flight == 2
+
+    asyncio.run(scenario())
+
+def test_queued_request_times_out_with_retry_after():
+    async def scenario():
+        controller = _controller(queue_timeout=0.05, latency_target=0.01)
+        await controller.acquire()
+        await controller.acquire()
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        assert error.value.reason == "timeout"
+        assert error.value.retry_after >= 1
+        assert controller.snapshot()["queued"] == 0
+
+    asyncio.run(scenario())
+
+def test_full_queue_is_rejected_immediately():
+    async def scenario():
+        controller = _controller(initial_limit=1, max_queue=1, latency_target=0.01)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        assert error.value.reason == "queue_full"
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+def test_request_that_cannot_make_its_deadline_is_rejected_immediately():
+    async def scenario():
+        controller = _controller(initial_limit=1, queue_timeout=1.0)
+        controller.request_latency = 5.0
+        await controller.acquire()
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        assert error.value.reason == "deadline"
+        assert error.value.retry_after == 5
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        controller = _controller(initial_limit=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+
+        controller.release()
+        assert controller.in_flight == 0
+        assert controller.snapshot()["queued"] == 0
+
+    asyncio.run(scenario())
+
+def test_fast_llm_calls_grow_the_limit():
+    controller = _controller(initial_limit=2)
+    for _ in range(10):
+        controller.in_flight += 1
+        controller.release(started=0.0, duration=0.5, llm_latency=0.2)
+    assert controller.limit > 4
+
+def test_slow_llm_calls_shrink_the_limit_once_per_round_trip():
+    controller = _controller(initial_limit=8)
+    controller.in_flight = 3
+    controller.release(started=1e9, duration=3.0, llm_latency=2.0)
+    after_first = controller.limit
+    # Started before the first decrease: same congestion episode, no second cut.
+    controller.release(started=0.0, duration=3.0, llm_latency=2.0)
+
+    assert after_first == pytest.approx(8 * 0.7)
+    assert controller.limit == after_first
+
+def test_failures_shrink_the_limit_but_not_below_the_minimum():
+    controller = _controller(initial_limit=2, min_limit=1)
+    for started in (1e9, 2e9, 3e9):
+        controller.in_flight += 1
+        controller.release(started=started, ok=False)
+    assert controller.limit == 1
+
+def test_admit_reports_failures():
+    async def scenario():
+        controller = _controller(initial_limit=4)
+        with pytest.raises(RuntimeError):
+            async with controller.admit():
+                raise RuntimeError("graph failed")
+        assert controller.in_flight == 0
+        assert controller.limit < 4
+
+    asyncio.run(scenario())
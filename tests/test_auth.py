@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from jose import jwt
+
+from src.auth import AuthError, TokenVerifier, user_id_from_claims
+
+SECRET = "test-secret"
+
+def _token(claims, secret=SECRET, algorithm="HS256"):
+    return jwt.encode(claims, secret, algorithm=algorithm)
+
+@pytest.fixture(params=["hmac", "jose"])
+def verifier(request):
+    return TokenVerifier(SECRET, backend=request.param, max_entries=100, ttl=300)
+
+def test_valid_token_returns_its_claims(verifier):
+    exp = int(time.time()) + 60
+    assert verifier.verify(_token({"id": 1, "exp": exp})) == {"id": 1, "exp": exp}
+
+@pytest.mark.parametrize("token, reason", [
+    (_token({"id": 1, "exp": int(time.time()) - 60}), "expired"),
+    (_token({"id": 1, "nbf": int(time.time()) + 3600}), "not_yet_valid"),
+    (_token({"id": 1}, secret="other"), "bad_signature"),
+    (_token({"id": 1}, algorithm="HS512"), "bad_algorithm"),
+    ("eyJhbGciOiJub25lIn0.eyJpZCI6MX0.", "bad_algorithm"),
+    (_token({"id": 1, "aud": "admin"}), "invalid_claims"),
+    (_token({"id": 1, "iat": "yesterday"}), "invalid_claims"),
+    ("not.a.jwt", "malformed"),
+    ("abc", "malformed"),
+])
+def test_rejections_have_the_same_reason_on_both_backends(verifier, token, reason):
+    with pytest.raises(AuthError) as error:
+        verifier.verify(token)
+    assert error.value.reason == reason
+
+def test_missing_secret_is_rejected():
+    with pytest.raises(AuthError) as error:
+        TokenVerifier(None).verify(_token({"id": 1}))
+    assert error.value.reason == "not_configured"
+
+def test_unknown_backend_is_refused():
+    with pytest.raises(ValueError):
+        TokenVerifier(SECRET, backend="rsa")
+
+def test_verified_claims_are_cached(verifier, monkeypatch):
+    token = _token({"id": 1, "exp": int(time.time()) + 60})
+    verifier.verify(token)
+    monkeypatch.setattr(verifier, "_decode", lambda *args: pytest.fail("decoded twice"))
+
+    assert verifier.verify(token)["id"] == 1
+
+def test_cached_token_is_rejected_once_it_expires(monkeypatch):
+    verifier = TokenVerifier(SECRET, max_entries=100)
+    now = time.time()
+    token = _token({"id": 1, "exp": int(now) + 10})
+    verifier.verify(token)
+
+    monkeypatch.setattr(time, "time", lambda: now + 20)
+
+    with pytest.raises(AuthError) as error:
+        verifier.verify(token)
+    assert error.value.reason == "expired"
+
+def test_tokens_without_exp_are_cached_for_the_ttl(monkeypatch):
+    verifier = TokenVerifier(SECRET, max_entries=100, ttl=30)
+    now = time.time()
+    token = _token({"id": 1})
+    verifier.verify(token)
+    calls = []
+    decode = verifier._decode
+    monkeypatch.setattr(verifier, "_decode", lambda *args: calls.append(1) or decode(*args))
+
+    verifier.verify(token)
+    monkeypatch.setattr(time, "time", lambda: now + 31)
+    verifier.verify(token)
+
+    assert calls == [1]
+
+def test_rejected_tokens_are_not_cached(monkeypatch):
+    verifier = TokenVerifier(SECRET, max_entries=100)
+    token = _token({"id": 1}, secret="other")
+    for _ in range(2):
+        with pytest.raises(AuthError):
+            verifier.verify(token)
+    assert not verifier._cache
+
+def test_cache_is_bounded():
+    verifier = TokenVerifier(SECRET, max_entries=3)
+    for user_id in range(10):
+        verifier.verify(_token({"id": user_id}))
+    assert len(verifier._cache) == 3
+
+def test_user_id_from_either_claim():
+    assert user_id_from_claims({"id": 1}) == 1
+    assert user_id_from_claims({"userId": 2}) == 2
+    with pytest.raises(AuthError) as error:
+        user_id_from_claims({"sub": "3"})
+    assert error.value.reason == "missing_user_id"
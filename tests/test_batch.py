@@ -0,0 +1,57 @@
+import pytest
+
+from src import batch, graph_builder
+
+LINES = [
+    '{"id": "a", "user_id": "7", "message": "xin chào"}',
+    "",
+    '{"id": "b", "message": "tìm tour Huế"}',
+    '{"id": "skipped", "user_id": 7}',
+    '{"id": "c", "user_id": 8, "text": "tìm tour lỗi"}',
+    '{"id": "d", "title": "tour Đà Nẵng"}',
+]
+
+@pytest.fixture
+def stub_search(monkeypatch):
+    # The fake LLM routes and answers; only the database lookups are stubbed.
+    def extract_entities(state):
+        return {"extracted_entities": {"destination": "Huế"}, "error": None}
+
+    def search_tours(state):
+        if "lỗi" in state["user_query"]:
+            raise RuntimeError("search backend down")
+        return {"search_results": [], "error": None}
+
+    monkeypatch.setattr(graph_builder, "fetch_locations_tool", lambda: ["Huế", "Đà Nẵng"])
+    monkeypatch.setattr(graph_builder, "extract_entities", extract_entities)
+    monkeypatch.setattr(graph_builder, "search_tours", search_tours)
+
+def test_read_items_tags_line_numbers_and_skips_lines_without_a_message():
+    items = list(batch.read_items(LINES))
+
+    assert [(item["index"], item["id"]) for item in items] == [(0, "a"), (2, "b"), (4, "c"), (5, "d")]
+    assert [item["message"] for item in items] == ["xin chào", "tìm tour Huế", "tìm tour lỗi", "tour Đà Nẵng"]
+
+def test_read_items_coerces_user_id_to_int():
+    items = list(batch.read_items(LINES))
+    assert [item["user_id"] for item in items] == [7, None, 8, None]
+
+def test_run_batch_returns_one_result_per_item_across_chunks(stub_search):
+    results = list(batch.run_batch(batch.read_items(LINES), concurrency=2, chunk_size=2, use_history=False))
+
+    by_id = {result["id"]: result for result in results}
+    assert sorted(by_id) == ["a", "b", "c", "d"]
+    assert {result["index"] for result in results} == {0, 2, 4, 5}
+    # Completion order may vary within a chunk, but never across chunks.
+    assert {r["id"] for r in results[:2]} == {"a", "b"}
+    assert by_id["a"]["route"] == "respond"
+    assert by_id["b"]["route"] == "search"
+    assert by_id["b"]["response"]
+
+def test_run_batch_captures_per_item_errors(stub_search):
+    results = list(batch.run_batch(batch.read_items(LINES), concurrency=4, use_history=False))
+
+    errors = {result["id"]: result["error"] for result in results}
+    assert errors["c"] == "RuntimeError: search backend down"
+    assert "response" not in next(r for r in results if r["id"] == "c")
+    assert errors["a"] is None and errors["b"] is None and errors["d"] is None
@@ -0,0 +1,173 @@
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+import src.cache as cache_module
+from src.cache import MISSING, Cache, InProcessCache, RedisCache, SQLiteCache
+
+def _redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCache(client=fakeredis.FakeRedis())
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InProcessCache(100)
+    if request.param == "sqlite":
+        return SQLiteCache(str(tmp_path / "cache.sqlite"), 100)
+    return _redis()
+
+def test_get_set_delete(backend):
+    cache = Cache("tours", ttl=60, backend=backend)
+    assert cache.get("1") is None
+    cache.set("1", {"tour_id": 1})
+    assert cache.get("1") == {"tour_id": 1}
+    cache.delete("1")
+    assert cache.get("1", "missing") == "missing"
+
+def test_entries_expire(backend):
+    cache = Cache("tours", ttl=0.05, backend=backend)
+    cache.set("1", "value")
+    time.sleep(0.1)
+    assert cache.get("1") is None
+
+def test_invalidate_drops_the_namespace_only(backend):
+    tours = Cache("tours", ttl=60, backend=backend)
+    locations = Cache("locations", ttl=60, backend=backend)
+    tours.set("1", "tour")
+    locations.set("available", ["Huế"])
+
+    tours.invalidate()
+
+    assert tours.get("1") is None
+    assert locations.get("available") == ["Huế"]
+
+def test_invalidate_is_seen_by_other_instances_on_the_backend(backend):
+    worker_a = Cache("tours", ttl=60, backend=backend)
+    worker_b = Cache("tours", ttl=60, backend=backend)
+    worker_a.set("1", "old")
+
+    worker_b.invalidate()
+
+    assert worker_a.get("1") is None
+
+def test_get_or_load_caches_the_loaded_value(backend):
+    cache = Cache("tours", ttl=60, backend=backend)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_load("1", loader) == "value"
+    assert cache.get_or_load("1", loader) == "value"
+    assert len(calls) == 1
+
+def test_invalidation_during_a_load_discards_its_value(backend):
+    cache = Cache("locations", ttl=60, backend=backend)
+
+    def stale_loader():
+        cache.invalidate()
+        return ["stale"]
+
+    assert cache.get_or_load("available", stale_loader) == ["stale"]
+    assert cache.get("available") is None
+    assert cache.get_or_load("available", lambda: ["fresh"]) == ["fresh"]
+
+def test_callers_after_an_invalidation_do_not_join_the_stale_load():
+    cache = Cache("locations", ttl=60, backend=InProcessCache(100))
+    started, release = threading.Event(), threading.Event()
+    results = {}
+
+    def stale_loader():
+        started.set()
+        release.wait(2)
+        return "stale"
+
+    leader = threading.Thread(target=lambda: results.setdefault("leader", cache.get_or_load("k", stale_loader)))
+    leader.start()
+    started.wait(2)
+    cache.invalidate()
+    results["after"] = cache.get_or_load("k", lambda: "fresh")
+    release.set()
+    leader.join()
+
+    assert results == {"leader": "stale", "after": "fresh"}
+    assert cache.get("k") == "fresh"
+
+def test_concurrent_misses_are_coalesced():
+    cache = Cache("search", ttl=60, backend=InProcessCache(100))
+    calls = []
+    barrier = threading.Barrier(5)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    def worker():
+        barrier.wait()
+        return cache.get_or_load("q", loader)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+def test_loader_errors_reach_every_waiter_and_are_not_cached():
+    cache = Cache("search", ttl=60, backend=InProcessCache(100))
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("q", lambda: (_ for _ in ()).throw(RuntimeError("db down")))
+    assert cache.get_or_load("q", lambda: "value") == "value"
+
+def test_uncacheable_values_are_returned_but_not_stored():
+    cache = Cache("entities", ttl=60, backend=InProcessCache(100))
+    assert cache.get_or_load("q", lambda: None) is None
+    assert cache.get_or_load("q", lambda: {"error": "x"}, cacheable=lambda v: "error" not in v) == {"error": "x"}
+    assert cache.get("q") is None
+
+def test_zero_ttl_disables_storage():
+    cache = Cache("tours", ttl=0, backend=InProcessCache(100))
+    assert cache.get_or_load("1", lambda: "value") == "value"
+    assert cache.get("1") is None
+
+def test_in_process_cache_evicts_least_recently_used():
+    backend = InProcessCache(2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is MISSING
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+
+def test_sqlite_default_path_is_a_private_per_user_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "SHM_DIR", str(tmp_path))
+
+    backend = SQLiteCache()
+
+    directory = tmp_path / f"travel_chatbot-{os.getuid()}"
+    assert backend.path == str(directory / "cache.sqlite")
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+def test_sqlite_refuses_a_shared_default_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "SHM_DIR", str(tmp_path))
+    directory = tmp_path / f"travel_chatbot-{os.getuid()}"
+    directory.mkdir()
+    directory.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        SQLiteCache()
+
+def test_sqlite_refuses_a_file_owned_by_another_user(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite"
+    SQLiteCache(str(path)).set("1", "value")
+    monkeypatch.setattr(cache_module.os, "getuid", lambda: path.stat().st_uid + 1)
+
+    with pytest.raises(PermissionError):
+        SQLiteCache(str(path))
@@ -0,0 +1,47 @@
+import pytest
+
+from src import cache_listener, promotions, tools
+from src.cache import Cache, InProcessCache
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    backend = InProcessCache(100)
+    for name in ("locations_cache", "entities_cache", "tours_cache", "search_cache"):
+        monkeypatch.setattr(tools, name, Cache(name, ttl=60, backend=backend))
+    monkeypatch.setattr(tools, "fetch_locations_tool", lambda: None)
+    calls = []
+    monkeypatch.setattr(promotions, "refresh_best_promotions", lambda: calls.append(1))
+    return calls
+
+def test_departure_change_refreshes_view_and_drops_its_tour(refreshes):
+    tools.tours_cache.set("1", "tour 1")
+    tools.tours_cache.set("2", "tour 2")
+    tools.search_cache.set("q", ["tour 1"])
+
+    cache_listener.apply_changes([{"table": "departure", "op": "UPDATE", "tour_id": 1}])
+
+    assert refreshes == [1]
+    assert tools.tours_cache.get("1") is None
+    assert tools.tours_cache.get("2") == "tour 2"
+    assert tools.search_cache.get("q") is None
+
+def test_only_the_refresh_leader_refreshes_the_view(refreshes):
+    cache_listener.apply_changes([{"table": "departure", "op": "UPDATE", "tour_id": 1}], refresh_promotions=False)
+    assert refreshes == []
+
+def test_tour_change_does_not_refresh_the_view(refreshes):
+    tools.locations_cache.set("available", ["Huế"])
+
+    cache_listener.apply_changes([{"table": "tour", "op": "INSERT", "tour_id": 3}])
+
+    assert refreshes == []
+    assert tools.locations_cache.get("available") is None
+
+def test_promotion_change_drops_every_tour(refreshes):
+    tools.tours_cache.set("1", "tour 1")
+    tools.tours_cache.set("2", "tour 2")
+
+    cache_listener.apply_changes([{"table": "promotion", "op": "UPDATE", "promotion_id": 5}])
+
+    assert refreshes == [1]
+    assert tools.tours_cache.get("1") is None and tools.tours_cache.get("2") is None
@@ -0,0 +1,159 @@
+import functools
+import json
+import pickle
+import threading
+
+import pytest
+
+from src import database
+
+class FakePool:
+    def getconn(self):
+        return FakeConnection()
+
+    def putconn(self, conn):
+        pass
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+@pytest.fixture
+def pool_of_one(monkeypatch):
+    monkeypatch.setattr(database, "get_conn_pool", lambda: FakePool())
+    monkeypatch.setattr(database, "_pool_slots", threading.BoundedSemaphore(1))
+
+def test_checkout_times_out_when_the_pool_is_exhausted(pool_of_one):
+    with database.get_pooled_connection():
+        with pytest.raises(database.PoolTimeout):
+            with database.get_pooled_connection(timeout=0.05):
+                pass
+
+def test_checkout_waits_for_a_connection_to_be_returned(pool_of_one):
+    held = threading.Event()
+
+    def hold_briefly():
+        with database.get_pooled_connection():
+            held.set()
+            threading.Event().wait(0.1)
+
+    thread = threading.Thread(target=hold_briefly)
+    thread.start()
+    held.wait(1)
+    with database.get_pooled_connection(timeout=2) as conn:
+        assert conn is not None
+    thread.join()
+
+def test_slot_is_returned_when_the_block_raises(pool_of_one):
+    with pytest.raises(ValueError):
+        with database.get_pooled_connection():
+            raise ValueError("query failed")
+    with database.get_pooled_connection(timeout=0.05):
+        pass
+
+def test_execute_query_reports_pool_timeouts_instead_of_no_rows(pool_of_one, monkeypatch):
+    monkeypatch.setattr(database, "get_pooled_connection", functools.partial(database.get_pooled_connection, timeout=0.05))
+    with database.get_pooled_connection():
+        with pytest.raises(database.PoolTimeout):
+            database.execute_query("SELECT 1", name="test", prepared=False)
+
+def test_record_is_a_read_only_mapping():
+    row = database.record_type(["tour_id", "title"])((7, "Huế 3 ngày"))
+
+    assert list(row) == ["tour_id", "title"]
+    assert len(row) == 2
+    assert row["title"] == "Huế 3 ngày"
+    assert row.get("price_adult", "N/A") == "N/A"
+    assert "tour_id" in row and "Huế 3 ngày" not in row
+    assert row == {"tour_id": 7, "title": "Huế 3 ngày"}
+    assert dict(row) == {"tour_id": 7, "title": "Huế 3 ngày"}
+    assert json.loads(json.dumps(row, default=dict, ensure_ascii=False)) == dict(row)
+    with pytest.raises(TypeError):
+        row["title"] = "Đà Nẵng"
+    with pytest.raises(AttributeError):
+        row.extra = 1
+
+def test_record_replace_returns_a_copy():
+    row = database.record_type(["tour_id", "itinerary"])((7, [{"day_number": 1}]))
+
+    updated = row.replace(itinerary="Ngày 1")
+
+    assert updated == {"tour_id": 7, "itinerary": "Ngày 1"}
+    assert row["itinerary"] == [{"day_number": 1}]
+    assert type(updated) is type(row)
+
+def test_record_survives_pickling():
+    row = database.record_type(["tour_id", "title"])((7, "Huế"))
+
+    restored = pickle.loads(pickle.dumps(row))
+
+    assert restored == row
+    assert type(restored) is type(row)
+
+class FakePreparingConnection:
+    def __init__(self):
+        self.prepared = set()
+        self.prepared_stale = False
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+def _cursor():
+    return FakeCursor(FakePreparingConnection())
+
+def test_prepare_rewrites_placeholders_and_escaped_percents():
+    cur = _cursor()
+    query = "SELECT * FROM Tour WHERE title ILIKE '%%' || %s || '%%' AND region = %s;"
+
+    execute = database._prepare_statement(cur, "search", query, ("Huế", "Miền Trung"))
+
+    statement = execute.split()[1]
+    assert cur.executed == [f"PREPARE {statement} AS SELECT * FROM Tour WHERE title ILIKE '%' || $1 || '%' AND region = $2"]
+    assert execute == f"EXECUTE {statement} (%s, %s)"
+    assert statement.startswith("search_")
+
+def test_prepared_statement_is_reused():
+    cur = _cursor()
+    query = "SELECT * FROM Tour WHERE tour_id = %s"
+
+    first = database._prepare_statement(cur, "tour", query, (1,))
+    second = database._prepare_statement(cur, "tour", query, (2,))
+
+    assert first == second
+    assert len(cur.executed) == 1
+
+def test_query_without_params_executes_bare():
+    cur = _cursor()
+    execute = database._prepare_statement(cur, "locations", "SELECT 1", None)
+    assert execute == f"EXECUTE {execute.split()[1]}"
+
+def test_prepare_stops_at_the_statement_cap(monkeypatch):
+    monkeypatch.setattr(database, "DB_MAX_PREPARED_STATEMENTS", 2)
+    cur = _cursor()
+
+    assert database._prepare_statement(cur, "q", "SELECT 1", None) is not None
+    assert database._prepare_statement(cur, "q", "SELECT 2", None) is not None
+    assert database._prepare_statement(cur, "q", "SELECT 3", None) is None
+    assert len(cur.connection.prepared) == 2
+    # Already prepared statements keep working at the cap.
+    assert database._prepare_statement(cur, "q", "SELECT 1", None) is not None
+
+def test_stale_connection_deallocates_before_preparing():
+    cur = _cursor()
+    database._prepare_statement(cur, "q", "SELECT 1", None)
+    cur.connection.prepared_stale = True
+
+    database._prepare_statement(cur, "q", "SELECT 1", None)
+
+    assert cur.executed[1] == "DEALLOCATE ALL"
+    assert cur.executed[2].startswith("PREPARE ")
+    assert cur.connection.prepared_stale is False
+    assert len(cur.connection.prepared) == 1
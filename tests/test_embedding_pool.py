@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.embedding_pool import EmbeddingWorkerPool
+
+DIMENSIONS = 4
+
+class StubModel:
+    """EmbeddingModel stand-in for the worker processes.
+
+    Each text embeds to [len(text), index, 0, 0]. Loading fails while the
+    counter in $STUB_EMBEDDING_FAILURES is positive, and a text equal to
+    "crash" kills the worker.
+    """
+
+    def __init__(self):
+        self.model = None
+        self.model_name = "stub"
+
+    def load_model(self):
+        counter = os.environ.get("STUB_EMBEDDING_FAILURES")
+        if counter and os.path.exists(counter):
+            with open(counter) as f:
+                remaining = int(f.read())
+            if remaining > 0:
+                with open(counter, "w") as f:
+                    f.write(str(remaining - 1))
+                raise RuntimeError("model download failed")
+        self.model = self
+
+    def encode(self, texts):
+        if "crash" in texts:
+            os._exit(1)
+        embeddings = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+        for i, text in enumerate(texts):
+            embeddings[i, :2] = (len(text), i)
+        return embeddings
+
+@pytest.fixture
+def make_pool():
+    pools = []
+    def make(**kwargs):
+        kwargs.setdefault("respawn_backoff", 0.05)
+        pool = EmbeddingWorkerPool(workers=1, model_class=StubModel, **kwargs)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+def test_round_trip_through_shared_memory(make_pool):
+    pool = make_pool()
+    pool.wait_ready(timeout=60)
+
+    assert pool.model_name == "stub"
+    assert pool.get_embedding("xin chào", timeout=10) == [[8.0, 0.0, 0.0, 0.0]]
+    assert pool.get_embedding(["a", "bb"], timeout=10) == [[1.0, 0.0, 0.0, 0.0], [2.0, 1.0, 0.0, 0.0]]
+
+def test_result_larger_than_the_buffer_comes_inline(make_pool):
+    pool = make_pool(buffer_bytes=2 * DIMENSIONS * 4)
+    pool.wait_ready(timeout=60)
+
+    texts = ["a", "bb", "ccc"]
+    assert pool.get_embedding(texts, timeout=10) == [[float(len(t)), float(i), 0.0, 0.0] for i, t in enumerate(texts)]
+    # The shared-memory path still works afterwards.
+    assert pool.get_embedding(["a", "bb"], timeout=10) == [[1.0, 0.0, 0.0, 0.0], [2.0, 1.0, 0.0, 0.0]]
+
+def test_crashed_worker_fails_its_request_and_is_restarted(make_pool):
+    pool = make_pool()
+    pool.wait_ready(timeout=60)
+
+    with pytest.raises(RuntimeError, match="exited"):
+        pool.get_embedding("crash", timeout=10)
+
+    pool.wait_ready(timeout=60)
+    assert pool.get_embedding("tour", timeout=10) == [[4.0, 0.0, 0.0, 0.0]]
+
+def test_worker_that_fails_to_load_is_retried(make_pool, tmp_path, monkeypatch):
+    counter = tmp_path / "failures"
+    counter.write_text("2")
+    monkeypatch.setenv("STUB_EMBEDDING_FAILURES", str(counter))
+    pool = make_pool()
+
+    pool.wait_ready(timeout=60)
+
+    assert counter.read_text() == "0"
+    assert pool.failed == {}
+    assert pool.get_embedding("tour", timeout=10) == [[4.0, 0.0, 0.0, 0.0]]
+
+def test_wait_ready_reports_the_load_error(make_pool, tmp_path, monkeypatch):
+    counter = tmp_path / "failures"
+    counter.write_text("1000")
+    monkeypatch.setenv("STUB_EMBEDDING_FAILURES", str(counter))
+    pool = make_pool(respawn_backoff=30)
+
+    with pytest.raises(RuntimeError, match="model download failed"):
+        pool.wait_ready(timeout=5)
+    with pytest.raises(RuntimeError, match="unavailable"):
+        pool.submit("tour")
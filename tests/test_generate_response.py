@@ -0,0 +1,41 @@
+from langchain_core.messages import HumanMessage
+
+from src import graph_builder
+from src.metrics import LLM_CALLS_AVOIDED
+from src.response_templates import NO_RESULTS_RESPONSE
+
+def _state(query, search_results, entities=None):
+    return {
+        "user_query": query,
+        "messages": [HumanMessage(content=query)],
+        "search_results": search_results,
+        "extracted_entities": entities if entities is not None else {"destination": "Huế"},
+        "error": None,
+    }
+
+def test_no_results_template_counts_as_an_avoided_llm_call():
+    before = LLM_CALLS_AVOIDED.value(template="no_results")
+
+    update = graph_builder.generate_response(_state("tour Huế", []))
+
+    assert update["final_response"] == NO_RESULTS_RESPONSE
+    assert update["llm_calls_avoided"] == 1
+    assert LLM_CALLS_AVOIDED.value(template="no_results") == before + 1
+
+def test_single_tour_template_counts_as_an_avoided_llm_call():
+    tour = {"tour_id": 7, "title": "Huế 3 ngày", "start_date": "2026-11-01", "price_adult": 5000000}
+
+    update = graph_builder.generate_response(_state("tour Huế", [tour, dict(tour, start_date="2026-11-08")]))
+
+    assert "Huế 3 ngày (ID: 7)" in update["final_response"]
+    assert update["llm_calls_avoided"] == 1
+
+def test_itinerary_answer_is_not_counted_as_avoided():
+    tour = {"tour_id": 7, "title": "Huế 3 ngày", "itinerary": "Ngày 1: Đại Nội"}
+    before = sum(LLM_CALLS_AVOIDED.values.values())
+
+    update = graph_builder.generate_response(_state("lịch trình tour 1", [tour]))
+
+    assert "Ngày 1: Đại Nội" in update["final_response"]
+    assert "llm_calls_avoided" not in update
+    assert sum(LLM_CALLS_AVOIDED.values.values()) == before
@@ -0,0 +1,54 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+
+from src.graph_state import MessageList, append_messages
+
+def test_appends_new_messages_without_copying_ids():
+    history = [HumanMessage(content="xin chào"), AIMessage(content="chào bạn")]
+    update = AIMessage(content="tour Đà Nẵng")
+
+    merged = append_messages(history, update)
+
+    assert [m.content for m in merged] == ["xin chào", "chào bạn", "tour Đà Nẵng"]
+    assert merged[:2] == history
+    assert merged[2] is update
+
+def test_accepts_a_list_update():
+    merged = append_messages([HumanMessage(content="a")], [AIMessage(content="b"), HumanMessage(content="c")])
+    assert [m.content for m in merged] == ["a", "b", "c"]
+
+def test_message_with_existing_id_replaces_it():
+    history = [HumanMessage(content="a", id="1"), AIMessage(content="b", id="2")]
+
+    merged = append_messages(history, AIMessage(content="b2", id="2"))
+
+    assert [(m.id, m.content) for m in merged] == [("1", "a"), ("2", "b2")]
+
+def test_remove_message_deletes_by_id():
+    history = [HumanMessage(content="a", id="1"), AIMessage(content="b", id="2")]
+
+    merged = append_messages(history, RemoveMessage(id="1"))
+
+    assert [m.id for m in merged] == ["2"]
+
+def test_does_not_mutate_the_previous_state():
+    history = [HumanMessage(content="a")]
+    append_messages(history, AIMessage(content="b"))
+    assert len(history) == 1
+
+def test_extends_a_history_it_already_owns_in_place():
+    owned = append_messages([HumanMessage(content="a")], AIMessage(content="b"))
+    assert isinstance(owned, MessageList)
+
+    merged = append_messages(owned, HumanMessage(content="c"))
+
+    assert merged is owned
+    assert [m.content for m in merged] == ["a", "b", "c"]
+
+def test_replacement_returns_an_owned_copy():
+    history = MessageList([HumanMessage(content="a", id="1")])
+
+    merged = append_messages(history, AIMessage(content="b"))
+    merged = append_messages(merged, HumanMessage(content="a2", id="1"))
+
+    assert isinstance(merged, MessageList)
+    assert [m.content for m in merged] == ["a2", "b"]
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import history_archive
+from src.history_archive import _CopyBuffer, _copy_text, _month_start, _next_month, ensure_partitions
+
+class FakeCursor:
+    def __init__(self, row=None):
+        self.row = row
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.row
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "\\N"),
+    ("xin chào", "xin chào"),
+    ("a\tb", "a\\tb"),
+    ("dòng 1\ndòng 2\r\n", "dòng 1\\ndòng 2\\r\\n"),
+    ("C:\\tours\\N", "C:\\\\tours\\\\N"),
+    (42, "42"),
+])
+def test_copy_text_escapes_copy_specials(value, expected):
+    assert _copy_text(value) == expected
+
+def test_copy_buffer_encodes_records_in_column_order():
+    source = _CopyBuffer([
+        {"user_id": 1, "message": "a\tb", "response": None, "interaction_time": "2024-12-01T00:00:00+00:00"},
+        {"interaction_time": "2024-12-02T00:00:00+00:00", "user_id": 2, "message": "c"},
+    ])
+
+    assert source.read() == (
+        "1\ta\\tb\t\\N\t2024-12-01T00:00:00+00:00\n"
+        "2\tc\t\\N\t2024-12-02T00:00:00+00:00\n"
+    )
+    assert source.count == 2
+    assert source.read() == ""
+
+def test_copy_buffer_small_reads_add_up_to_the_whole():
+    records = [{"user_id": i, "message": f"tin nhắn {i}\n", "response": "ok", "interaction_time": "t"} for i in range(50)]
+    expected = _CopyBuffer(records).read()
+
+    source = _CopyBuffer(records)
+    chunks = []
+    while True:
+        chunk = source.read(7)
+        if not chunk:
+            break
+        assert len(chunk) <= 7
+        chunks.append(chunk)
+
+    assert "".join(chunks) == expected
+    assert source.count == 50
+
+def test_month_start_is_taken_in_utc():
+    local = datetime(2024, 3, 1, 2, 0, tzinfo=timezone(timedelta(hours=7)))
+    assert _month_start(local) == datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+@pytest.mark.parametrize("month, following", [
+    (datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 2, 1, tzinfo=timezone.utc)),
+    (datetime(2024, 11, 1, tzinfo=timezone.utc), datetime(2024, 12, 1, tzinfo=timezone.utc)),
+    (datetime(2024, 12, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc)),
+])
+def test_next_month_rolls_over_the_year(month, following):
+    assert _next_month(month) == following
+
+def test_ensure_partitions_covers_the_range_month_by_month():
+    cur = FakeCursor()
+
+    ensure_partitions(cur, datetime(2024, 11, 15, tzinfo=timezone.utc), datetime(2025, 1, 2, tzinfo=timezone.utc))
+
+    names = [sql.split()[5] for sql, _ in cur.executed]
+    assert names == ["chatbothistory_archive_202411", "chatbothistory_archive_202412", "chatbothistory_archive_202501"]
+    assert cur.executed[1][1] == (datetime(2024, 12, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+def test_ensure_partitions_end_is_exclusive():
+    cur = FakeCursor()
+    ensure_partitions(cur, datetime(2024, 11, 1, tzinfo=timezone.utc), datetime(2024, 12, 1, tzinfo=timezone.utc))
+    assert len(cur.executed) == 1
+
+@pytest.mark.parametrize("archive_exists, expected", [
+    (True, history_archive.EXPORT_SQL),
+    (False, history_archive.HOT_EXPORT_SQL),
+])
+def test_export_reads_the_archive_only_when_it_exists(archive_exists, expected):
+    cur = FakeCursor(row=(archive_exists,))
+
+    assert history_archive._export_sql(cur) == expected
+    assert cur.executed == [("SELECT to_regclass(%s) IS NOT NULL", ("chatbothistory_archive",))]
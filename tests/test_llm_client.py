@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from src.fake_llm import FakeChatModel
+from src.llm import LLMClient, LLMTimeoutError
+
+class ScriptedModel:
+    """FakeChatModel whose n-th call sleeps delays[n] and raises errors[n] if set.
+
+    Like a real client, a call gives up with TimeoutError after `timeout`.
+    """
+
+    def __init__(self, delays, errors=None):
+        self.model = FakeChatModel(response="ok")
+        self.delays = list(delays)
+        self.errors = dict(errors or {})
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt, timeout=None):
+        with self.lock:
+            n = self.calls
+            self.calls += 1
+        delay = self.delays[min(n, len(self.delays) - 1)]
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("request timed out")
+        time.sleep(delay)
+        if n in self.errors:
+            raise self.errors[n]
+        return self.model.invoke(prompt)
+
+def _client(model, **kwargs):
+    kwargs.setdefault("max_retries", 0)
+    kwargs.setdefault("timeout", 2.0)
+    return LLMClient(model, **kwargs)
+
+@pytest.mark.parametrize("hedge_after", [None, 0.2])
+def test_fast_success_returns_the_primary_result(hedge_after):
+    model = ScriptedModel([0.01])
+    client = _client(model, hedge_after=hedge_after)
+
+    assert client.invoke("xin chào").content == "ok"
+    assert model.calls == 1
+    assert client.metrics.hedges == 0
+
+def test_fast_success_in_p95_mode():
+    model = ScriptedModel([0.01])
+    client = _client(model, hedge_after="p95", min_hedge_samples=5)
+
+    for _ in range(10):
+        assert client.invoke("xin chào").content == "ok"
+    assert client.metrics.timeouts == 0
+
+@pytest.mark.parametrize("hedge_after", [None, 0.2])
+def test_fast_failure_raises_the_primary_error(hedge_after):
+    model = ScriptedModel([0.01], errors={0: ValueError("bad prompt")})
+    client = _client(model, hedge_after=hedge_after)
+
+    with pytest.raises(ValueError, match="bad prompt"):
+        client.invoke("xin chào")
+    assert model.calls == 1
+
+def test_hedge_wins_when_the_primary_is_slow():
+    model = ScriptedModel([1.0, 0.01])
+    client = _client(model, hedge_after=0.05)
+
+    start = time.perf_counter()
+    assert client.invoke("xin chào").content == "ok"
+
+    assert time.perf_counter() - start < 0.5
+    assert client.metrics.hedges == 1
+    assert client.metrics.hedge_wins == 1
+
+def test_deadline_exceeded_raises_timeout():
+    model = ScriptedModel([0.5])
+    client = _client(model, timeout=0.1, hedge_after=0.05)
+
+    with pytest.raises(LLMTimeoutError):
+        client.invoke("xin chào")
+    assert client.metrics.timeouts == 1
+
+def test_retryable_error_is_retried():
+    model = ScriptedModel([0.01], errors={0: ConnectionError("reset")})
+    client = _client(model, max_retries=1, backoff_base=0.01)
+
+    assert client.invoke("xin chào").content == "ok"
+    assert client.metrics.retries == 1
+
+def test_hung_calls_free_their_slots_by_the_deadline():
+    model = ScriptedModel([5.0, 5.0, 0.01])
+    client = _client(model, timeout=0.2, max_concurrency=2)
+
+    errors = []
+    def call():
+        try:
+            client.invoke("xin chào")
+        except LLMTimeoutError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+
+    start = time.perf_counter()
+    assert client.invoke("xin chào").content == "ok"
+    assert time.perf_counter() - start < 0.2
+    assert model.calls == 3
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from src import graph_builder
+
+STATE = {"user_query": "tour Đà Nẵng", "current_date": "2026-10-19", "messages": []}
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"ner": 0, "search": 0}
+    ner_started = threading.Event()
+
+    def extract_entities(state):
+        calls["ner"] += 1
+        ner_started.set()
+        time.sleep(0.1)
+        return {"extracted_entities": {"destination": "Đà Nẵng"}, "error": None}
+
+    def search_tours(state):
+        calls["search"] += 1
+        return {"search_results": [{"tour_id": 1}]}
+
+    monkeypatch.setattr(graph_builder, "extract_entities", extract_entities)
+    monkeypatch.setattr(graph_builder, "search_tours", search_tours)
+    calls["ner_started"] = ner_started
+    return calls
+
+def _route(monkeypatch, decision, wait_for=None):
+    def route_query(state):
+        if wait_for is not None:
+            wait_for.wait(1)
+        return {"routing_decision": decision}
+    monkeypatch.setattr(graph_builder, "route_query", route_query)
+
+def test_search_turn_uses_prefetched_results(monkeypatch, calls):
+    _route(monkeypatch, "search")
+
+    update = graph_builder.route_and_prefetch(STATE)
+
+    assert update["routing_decision"] == "search"
+    assert update["search_results"] == [{"tour_id": 1}]
+    assert calls["search"] == 1
+
+def test_respond_turn_skips_the_speculative_search(monkeypatch, calls):
+    _route(monkeypatch, "respond", wait_for=calls["ner_started"])
+
+    update = graph_builder.route_and_prefetch(STATE)
+    time.sleep(0.3)
+
+    assert update == {"routing_decision": "respond"}
+    assert calls["ner"] == 1
+    assert calls["search"] == 0
+
+def test_busy_workers_fall_back_to_routing_first(monkeypatch, calls):
+    _route(monkeypatch, "respond")
+    monkeypatch.setattr(graph_builder, "_speculation_slots", threading.BoundedSemaphore(1))
+    graph_builder._speculation_slots.acquire()
+
+    update = graph_builder.route_and_prefetch(STATE)
+
+    assert update == {"routing_decision": "respond"}
+    assert calls["ner"] == 0 and calls["search"] == 0
+
+def test_busy_workers_still_search_on_search_turns(monkeypatch, calls):
+    _route(monkeypatch, "search")
+    monkeypatch.setattr(graph_builder, "_speculation_slots", threading.BoundedSemaphore(1))
+    graph_builder._speculation_slots.acquire()
+
+    update = graph_builder.route_and_prefetch(STATE)
+
+    assert update["search_results"] == [{"tour_id": 1}]
+    assert calls["ner"] == 1 and calls["search"] == 1
+
+def test_slot_is_returned_when_the_prefetch_finishes(monkeypatch, calls):
+    _route(monkeypatch, "respond")
+    monkeypatch.setattr(graph_builder, "_speculation_slots", threading.BoundedSemaphore(1))
+
+    graph_builder.route_and_prefetch(STATE)
+    time.sleep(0.3)
+
+    assert graph_builder._speculation_slots.acquire(blocking=False)